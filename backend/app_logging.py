@@ -0,0 +1,184 @@
+"""
+Non-blocking structured logging.
+
+Request threads only put records on a queue; a QueueListener thread formats
+them as JSON lines and does the file I/O. Configured by create_app, so it
+behaves the same under `app.run` and gunicorn, including `--preload`, where
+the listener thread is restarted in each forked worker.
+
+By default every process appends to LOG_FILE and leaves rotation to
+logrotate (or similar): the file is reopened when it is moved, so any number
+of workers can share it. LOG_ROTATE=size rotates in-process, which is only
+safe with one writer per file: a single process, or a LOG_FILE containing
+{pid} so each worker has its own.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+
+from flask import g, has_request_context, request
+
+# Attributes copied from a record (request context or `extra=`) into the JSON line
+CONTEXT_FIELDS = (
+    'request_id', 'route', 'method', 'status', 'latency_ms', 'db_ms', 'db_queries',
+    'user_id', 'ip', 'event', 'sampled'
+)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class StructuredQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback out of the message text"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request id and route.
+
+    Runs on the emitting thread (it is attached to the QueueHandler), which
+    is the only place the Flask request context is available.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            if getattr(record, 'request_id', None) is None:
+                record.request_id = g.get('request_id')
+            if getattr(record, 'route', None) is None:
+                record.route = request.url_rule.rule if request.url_rule else request.path
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep 1 in N records per `event` (e.g. login_failed=20).
+
+    Kept records carry `sampled=N` so counts can be scaled back up.
+    Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse(value):
+        """'login_failed=20,request=5' -> {'login_failed': 20, 'request': 5}"""
+        rates = {}
+        for item in (value or '').split(','):
+            event, _, rate = item.partition('=')
+            if event.strip() and rate.strip():
+                rates[event.strip()] = max(int(rate), 1)
+        return rates
+
+    def filter(self, record):
+        rate = self.rates.get(getattr(record, 'event', None), 1)
+        if rate <= 1 or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            count = self._counts.get(record.event, 0)
+            self._counts[record.event] = count + 1
+        if count % rate:
+            return False
+        record.sampled = rate
+        return True
+
+
+def _file_handler():
+    path = os.getenv('LOG_FILE', 'app.log').format(pid=os.getpid())
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.getenv('LOG_ROTATE', 'external') != 'size':
+        # logrotate (or similar) owns rotation; reopen when the file is moved
+        return WatchedFileHandler(path)
+    # Workers sharing one file would each rotate it and clobber the backups
+    return RotatingFileHandler(
+        path,
+        maxBytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backupCount=int(os.getenv('LOG_BACKUP_COUNT', 5))
+    )
+
+
+def _build_handlers():
+    handlers = [_file_handler()]
+    if os.getenv('LOG_STDERR', 'false').lower() == 'true':
+        handlers.append(logging.StreamHandler(sys.stderr))
+    formatter = JsonFormatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return tuple(handlers)
+
+
+_configured = {}  # logger name -> (queue handler, listener)
+_configured_lock = threading.Lock()
+
+
+def configure_logging(logger):
+    """Route `logger` through a queue to JSON file (and optional stderr) handlers.
+
+    Idempotent per logger: create_app() runs once per app (benchmarks and
+    checks build several), and later calls reuse the first listener thread.
+    """
+    with _configured_lock:
+        if logger.name in _configured:
+            queue_handler, listener = _configured[logger.name]
+            logger.handlers = [queue_handler]
+            return listener
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = StructuredQueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+        queue_handler.addFilter(SamplingFilter(SamplingFilter.parse(os.getenv('LOG_SAMPLE_RATES', 'login_failed=20'))))
+
+        logger.handlers = [queue_handler]
+        logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+        logger.propagate = False
+
+        listener = QueueListener(log_queue, *_build_handlers(), respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+
+        def restart_in_child():
+            # The listener thread does not survive fork (gunicorn --preload)
+            listener._thread = None
+            if '{pid}' in os.getenv('LOG_FILE', ''):
+                listener.handlers = _build_handlers()
+            listener.start()
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=restart_in_child)
+        _configured[logger.name] = (queue_handler, listener)
+        return listener
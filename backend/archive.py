@@ -0,0 +1,109 @@
+"""
+Hot/cold archiving of closed sales periods.
+
+Transactions older than the archive boundary live in transactions_archive /
+transaction_items_archive, and their per-day totals in sales_daily. Reports
+read sales_daily below the boundary and the hot tables above it.
+"""
+import time
+from datetime import date, timedelta
+
+from reports import DAILY_SALES_QUERY
+
+ARCHIVE_NAME = 'transactions'
+
+ARCHIVE_BOUNDARY_QUERY = "SELECT archived_before FROM archive_state WHERE name = %s"
+
+# Open-ended report ranges are clamped to these
+MIN_DATE = date(1970, 1, 1)
+MAX_DATE = date(9999, 12, 31)
+
+ROLLUP_ARCHIVED_DAYS_QUERY = (
+    "INSERT INTO sales_daily (sale_date, transactions, total_sales, items_sold) "
+    + DAILY_SALES_QUERY.format(items_table='transaction_items', transactions_table='transactions')
+    + """ON DUPLICATE KEY UPDATE
+    transactions = VALUES(transactions),
+    total_sales = VALUES(total_sales),
+    items_sold = VALUES(items_sold)
+"""
+)
+
+
+def get_archive_boundary(cursor):
+    """Date before which sales have been archived, or None"""
+    cursor.execute(ARCHIVE_BOUNDARY_QUERY, (ARCHIVE_NAME,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return row['archived_before'] if isinstance(row, dict) else row[0]
+
+
+def split_range(start, end, boundary):
+    """Split the inclusive date range [start, end] at the archive boundary.
+
+    Returns (archived, hot), each a half-open (from, to) date pair or None
+    when that side of the boundary is not needed.
+    """
+    start = start or MIN_DATE
+    end_exclusive = (end or MAX_DATE - timedelta(days=1)) + timedelta(days=1)
+    if not boundary or boundary <= start:
+        return None, (start, end_exclusive)
+    if end_exclusive <= boundary:
+        return (start, end_exclusive), None
+    return (start, boundary), (boundary, end_exclusive)
+
+
+def archive_transactions(conn, cutoff, batch_size=1000, pause=0.05, log=print):
+    """Move every transaction created before `cutoff` (a date) to the archive.
+
+    The daily rollup and the new boundary are committed first, so reports
+    switch to sales_daily for those days before any row moves. Rows then move
+    in small batches, each its own transaction, to keep lock times short; a
+    rerun after a crash resumes where it stopped.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        boundary = get_archive_boundary(cursor)
+        if not boundary or boundary < cutoff:
+            cursor.execute(ROLLUP_ARCHIVED_DAYS_QUERY, (boundary or MIN_DATE, cutoff))
+            cursor.execute(
+                """INSERT INTO archive_state (name, archived_before) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE archived_before = VALUES(archived_before)""",
+                (ARCHIVE_NAME, cutoff)
+            )
+            conn.commit()
+            log(f"[OK] Rolled up sales before {cutoff} into sales_daily")
+        else:
+            cutoff = boundary
+
+        moved = 0
+        while True:
+            cursor.execute(
+                """SELECT transaction_id FROM transactions
+                WHERE created_at < %s ORDER BY created_at LIMIT %s""",
+                (cutoff, batch_size)
+            )
+            ids = [row['transaction_id'] for row in cursor.fetchall()]
+            if not ids:
+                break
+
+            placeholders = ', '.join(['%s'] * len(ids))
+            for statement in (
+                "INSERT IGNORE INTO transactions_archive SELECT * FROM transactions WHERE transaction_id IN ({})",
+                "INSERT IGNORE INTO transaction_items_archive SELECT * FROM transaction_items WHERE transaction_id IN ({})",
+                "DELETE FROM transaction_items WHERE transaction_id IN ({})",
+                "DELETE FROM transactions WHERE transaction_id IN ({})",
+            ):
+                cursor.execute(statement.format(placeholders), ids)
+            conn.commit()
+
+            moved += len(ids)
+            log(f"[INFO] Archived {moved} transactions...")
+            time.sleep(pause)
+
+        return {'archived_before': cutoff, 'transactions': moved}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Audit log partition maintenance. Run monthly (or nightly) from cron:
+creates upcoming monthly partitions and archives/drops expired ones.
+"""
+import argparse
+import mysql.connector
+import os
+from dotenv import load_dotenv
+
+from audit import apply_retention, ensure_future_partitions, migrate_to_partitioned
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--migrate', action='store_true',
+                        help='one-off: rebuild an unpartitioned audit_logs table '
+                             '(the app can keep running; rows logged meanwhile are copied too)')
+    parser.add_argument('--retention-months', type=int,
+                        default=int(os.getenv('AUDIT_RETENTION_MONTHS', 12)))
+    parser.add_argument('--archive-dir', default=os.getenv('AUDIT_ARCHIVE_DIR', 'archive/audit_logs'))
+    parser.add_argument('--no-archive', action='store_true',
+                        help='drop expired partitions without exporting them')
+    parser.add_argument('--months-ahead', type=int, default=3)
+    args = parser.parse_args()
+
+    conn = None
+    try:
+        # Connect to database
+        conn = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME')
+        )
+        cursor = conn.cursor(dictionary=True)
+
+        if args.migrate:
+            count = migrate_to_partitioned(cursor, args.months_ahead)
+            conn.commit()
+            print(f"[OK] audit_logs rebuilt with {count} monthly partitions (old table kept as audit_logs_legacy)")
+
+        created = ensure_future_partitions(cursor, args.months_ahead)
+        if created:
+            print(f"[OK] Created partitions: {', '.join(created)}")
+
+        removed = apply_retention(
+            cursor, args.retention_months, None if args.no_archive else args.archive_dir
+        )
+        for part in removed:
+            target = part['archive'] or 'not archived'
+            print(f"[OK] Dropped {part['partition']} ({part['rows']} rows -> {target})")
+        if not created and not removed:
+            print("[INFO] Audit log partitions already up to date")
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+    finally:
+        if conn and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+if __name__ == "__main__":
+    main()
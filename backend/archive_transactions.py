@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Move closed sales months out of the hot transaction tables. Run monthly
+from cron; keeps TRANSACTION_HOT_MONTHS full months plus the current one hot.
+"""
+import argparse
+import mysql.connector
+import os
+from datetime import date
+from dotenv import load_dotenv
+
+from archive import archive_transactions
+from audit import add_months
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keep-months', type=int,
+                        default=int(os.getenv('TRANSACTION_HOT_MONTHS', 6)))
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    cutoff = add_months(date.today().replace(day=1), -args.keep_months)
+
+    conn = None
+    try:
+        # Connect to database
+        conn = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME')
+        )
+
+        print(f"[INFO] Archiving transactions created before {cutoff}...")
+        result = archive_transactions(conn, cutoff, args.batch_size)
+        print(f"[OK] {result['transactions']} transactions archived; "
+              f"hot tables now start at {result['archived_before']}")
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
+if __name__ == "__main__":
+    main()
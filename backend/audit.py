@@ -0,0 +1,184 @@
+"""
+Audit log storage: monthly range partitions on created_at, retention and archival
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+PARTITION_PREFIX = 'p'
+MAX_PARTITION = 'pmax'
+
+AUDIT_TABLE_DDL = """
+CREATE TABLE {table} (
+    log_id BIGINT NOT NULL AUTO_INCREMENT,
+    user_id INT NULL,
+    action VARCHAR(255) NOT NULL,
+    ip_address VARCHAR(45) NULL,
+    user_agent TEXT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (created_at, log_id),
+    KEY idx_log_id (log_id),
+    KEY idx_user_created (user_id, created_at),
+    KEY idx_action_created (action, created_at)
+)
+PARTITION BY RANGE COLUMNS(created_at) (
+{partitions}
+)
+"""
+
+# Keyset page, newest first. The constant created_at bounds let MySQL prune
+# every partition outside the requested range.
+AUDIT_PAGE_QUERY = """
+SELECT a.log_id, a.user_id, a.action, a.ip_address, a.user_agent, a.created_at,
+       u.email AS user_email
+FROM audit_logs a
+LEFT JOIN users u ON u.user_id = a.user_id
+WHERE a.created_at >= %s AND a.created_at < %s
+{after}
+ORDER BY a.created_at DESC, a.log_id DESC
+LIMIT %s
+"""
+
+AUDIT_AFTER_CLAUSE = "AND (a.created_at < %s OR (a.created_at = %s AND a.log_id < %s))"
+
+
+def add_months(month, count):
+    """First day of the month `count` months after `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def partition_clause(month):
+    """Partition holding every row of `month`"""
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')"
+
+
+def encode_cursor(row):
+    return f"{row['created_at']:%Y-%m-%dT%H:%M:%S}_{row['log_id']}"
+
+
+def decode_cursor(value):
+    """Return (created_at, log_id) or raise ValueError"""
+    created_at, log_id = value.rsplit('_', 1)
+    return datetime.strptime(created_at, '%Y-%m-%dT%H:%M:%S'), int(log_id)
+
+
+def list_partitions(cursor, table='audit_logs'):
+    """Monthly partitions of `table` as [(name, month)], oldest first"""
+    cursor.execute(
+        """SELECT PARTITION_NAME AS name FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION""",
+        (table,)
+    )
+    partitions = []
+    for row in cursor.fetchall():
+        name = row['name'] if isinstance(row, dict) else row[0]
+        if name != MAX_PARTITION:
+            partitions.append((name, datetime.strptime(name[len(PARTITION_PREFIX):], '%Y%m').date()))
+    return partitions
+
+
+def ensure_future_partitions(cursor, months_ahead=3, today=None):
+    """Split pmax so the next `months_ahead` months each have a partition"""
+    this_month = (today or date.today()).replace(day=1)
+    existing = {month for _, month in list_partitions(cursor)}
+    latest = max(existing) if existing else add_months(this_month, -1)
+
+    missing = []
+    month = add_months(latest, 1)
+    while month <= add_months(this_month, months_ahead):
+        missing.append(month)
+        month = add_months(month, 1)
+
+    if missing:
+        cursor.execute(
+            f"ALTER TABLE audit_logs REORGANIZE PARTITION {MAX_PARTITION} INTO ("
+            + ", ".join(partition_clause(m) for m in missing)
+            + f", PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE))"
+        )
+    return [partition_name(m) for m in missing]
+
+
+def archive_partition(cursor, name, archive_dir, batch_size=5000):
+    """Stream one partition to a gzipped JSON-lines file; returns (path, rows)"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"audit_logs_{name}.jsonl.gz")
+    tmp_path = path + '.tmp'
+    rows = 0
+
+    cursor.execute(
+        f"""SELECT log_id, user_id, action, ip_address, user_agent, created_at
+        FROM audit_logs PARTITION ({name}) ORDER BY created_at, log_id"""
+    )
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as out:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                out.write(json.dumps(row, default=str) + '\n')
+            rows += len(batch)
+    # Only a complete file ever gets the final name
+    os.replace(tmp_path, path)
+    return path, rows
+
+
+def apply_retention(cursor, retention_months, archive_dir=None, today=None):
+    """Drop (after archiving, if archive_dir is set) partitions older than the retention window"""
+    cutoff = add_months((today or date.today()).replace(day=1), -retention_months)
+    removed = []
+    for name, month in list_partitions(cursor):
+        if month >= cutoff:
+            break
+        archived = archive_partition(cursor, name, archive_dir) if archive_dir else (None, 0)
+        cursor.execute(f"ALTER TABLE audit_logs DROP PARTITION {name}")
+        removed.append({'partition': name, 'archive': archived[0], 'rows': archived[1]})
+    return removed
+
+
+def migrate_to_partitioned(cursor, months_ahead=3, today=None):
+    """Rebuild audit_logs as a partitioned table, keeping the old one as audit_logs_legacy.
+
+    Safe while the app keeps logging: rows written during the bulk copy land
+    in the old table above the copied log_id and are copied over after the
+    RENAME, which waits for in-flight writes. Commit afterwards.
+    """
+    this_month = (today or date.today()).replace(day=1)
+    cursor.execute("SELECT MIN(created_at) AS oldest, MAX(log_id) AS last_id FROM audit_logs")
+    row = cursor.fetchone()
+    oldest, last_id = (row['oldest'], row['last_id']) if isinstance(row, dict) else row
+    month = oldest.date().replace(day=1) if oldest else this_month
+
+    clauses = []
+    while month <= add_months(this_month, months_ahead):
+        clauses.append(partition_clause(month))
+        month = add_months(month, 1)
+    clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+
+    cursor.execute("DROP TABLE IF EXISTS audit_logs_partitioned")
+    cursor.execute(AUDIT_TABLE_DDL.format(
+        table='audit_logs_partitioned', partitions=',\n'.join(clauses)
+    ))
+    cursor.execute(
+        """INSERT INTO audit_logs_partitioned (user_id, action, ip_address, user_agent, created_at)
+        SELECT user_id, action, ip_address, user_agent, created_at
+        FROM audit_logs WHERE log_id <= %s ORDER BY created_at""",
+        (last_id or 0,)
+    )
+    cursor.execute(
+        "RENAME TABLE audit_logs TO audit_logs_legacy, audit_logs_partitioned TO audit_logs"
+    )
+    # Catch up on rows logged while the bulk copy ran
+    cursor.execute(
+        """INSERT INTO audit_logs (user_id, action, ip_address, user_agent, created_at)
+        SELECT user_id, action, ip_address, user_agent, created_at
+        FROM audit_logs_legacy WHERE log_id > %s ORDER BY log_id""",
+        (last_id or 0,)
+    )
+    return len(clauses) - 1
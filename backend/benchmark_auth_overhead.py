@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request cost of authentication on an admin route.
+
+Sends requests through the Flask test client to routes that differ only in
+how they authorize:
+
+  none      no auth at all (baseline)
+  token     role read from the token, as before (no revocation)
+  cached    role_required: role/active flag from the identity cache
+  uncached  role_required with a users query per request (--db only)
+
+Without --db a synthetic user is primed into the cache, so no database is
+needed. With --db the uncached run queries the database in .env.
+
+    python benchmark_auth_overhead.py
+    python benchmark_auth_overhead.py --db --user-id 1 --requests 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+import timeit
+from dotenv import load_dotenv
+from flask import jsonify, request
+from flask_jwt_extended import create_access_token, decode_token
+
+# Load environment variables
+load_dotenv()
+os.environ.setdefault('LOG_FILE', os.devnull)
+
+import clessaapp
+from identity_cache import IdentityCache
+
+
+def ok():
+    return jsonify({'ok': True})
+
+
+def token_only():
+    """The old role check: trust whatever role the token was minted with"""
+    claims = decode_token(request.headers['Authorization'].split()[1])
+    if claims['sub']['role'] != 'admin':
+        return jsonify({"error": "Insufficient permissions"}), 403
+    return ok()
+
+
+def time_route(client, path, headers, requests):
+    for _ in range(50):
+        client.get(path, headers=headers)
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path, headers=headers)
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, (path, response.status_code, response.get_json())
+    return elapsed / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--db', action='store_true', help='also time a users query per request')
+    parser.add_argument('--user-id', type=int, default=1, help='admin user for --db')
+    args = parser.parse_args()
+
+    app = clessaapp.create_app({'JWT_SECRET_KEY': os.getenv('JWT_SECRET') or 'benchmark', 'RATELIMIT_ENABLED': False})
+    app.add_url_rule('/bench/none', 'bench_none', ok)
+    app.add_url_rule('/bench/token', 'bench_token', token_only)
+    app.add_url_rule('/bench/role', 'bench_role', clessaapp.role_required('admin')(ok))
+    client = app.test_client()
+
+    identity = {'user_id': args.user_id, 'email': 'bench@example.com', 'role': 'admin', 'is_active': True}
+    with app.app_context():
+        token = create_access_token(identity={k: identity[k] for k in ('user_id', 'role', 'email')})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # One process, no marker files: measures the in-memory path
+    cache = clessaapp._identity_cache = IdentityCache(ttl=3600)
+    if args.db:
+        cache.get(args.user_id, clessaapp._load_identity)
+    else:
+        cache.put(args.user_id, identity)
+
+    results = {
+        'none': time_route(client, '/bench/none', headers, args.requests),
+        'token': time_route(client, '/bench/token', headers, args.requests),
+        'cached': time_route(client, '/bench/role', headers, args.requests),
+    }
+    if args.db:
+        clessaapp._identity_cache = IdentityCache(ttl=0)
+        results['uncached'] = time_route(client, '/bench/role', headers, min(args.requests, 1000))
+
+    print(f"[INFO] {args.requests} requests per route ({'database' if args.db else 'synthetic user'})")
+    for name, micros in results.items():
+        print(f"  {name:<9}: {micros:8.1f} us/request  (+{micros - results['none']:7.1f} us over no auth)")
+
+    with tempfile.TemporaryDirectory() as shared_dir:
+        for name, c in (('in-process', IdentityCache(ttl=3600)),
+                        ('with marker stat', IdentityCache(ttl=3600, shared_dir=shared_dir))):
+            c.put(args.user_id, identity)
+            seconds = min(timeit.repeat(lambda: c.get(args.user_id, clessaapp._load_identity), number=100000, repeat=3))
+            print(f"  cache hit ({name}): {seconds / 100000 * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
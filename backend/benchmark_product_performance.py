@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the product performance report from the daily rollup vs the naive
+join over transaction_items, both run by MySQL.
+
+Seeds a scratch schema (default <DB_NAME>_perf_bench, on the server from .env)
+with synthetic products, transactions, line items and the product_sales_daily
+rollup built from them, then times each query the way the endpoint runs it
+(query, then rank_variants) for a recent range and for all time. The top 10
+of both must match.
+
+    python benchmark_product_performance.py
+    python benchmark_product_performance.py --items 10000000 --range-days 90
+    python benchmark_product_performance.py --skip-seed    # reuse the last seed
+    python benchmark_product_performance.py --drop         # remove the scratch schema
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+import mysql.connector
+import numpy as np
+from dotenv import load_dotenv
+
+import db
+from reports import PRODUCT_PERFORMANCE_QUERY, rank_variants
+
+# Load environment variables
+load_dotenv()
+
+SCHEMA_DDL = (
+    """CREATE TABLE products (
+        product_id INT NOT NULL PRIMARY KEY,
+        cost_price DECIMAL(10, 2) NOT NULL
+    )""",
+    """CREATE TABLE product_variants (
+        variant_id INT NOT NULL PRIMARY KEY,
+        product_id INT NOT NULL,
+        INDEX idx_product_id (product_id)
+    )""",
+    """CREATE TABLE transactions (
+        transaction_id INT NOT NULL PRIMARY KEY,
+        created_at DATETIME NOT NULL,
+        INDEX idx_created_at (created_at)
+    )""",
+    """CREATE TABLE transaction_items (
+        item_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+        transaction_id INT NOT NULL,
+        variant_id INT NOT NULL,
+        quantity INT NOT NULL,
+        unit_price DECIMAL(10, 2) NOT NULL,
+        INDEX idx_transaction_id (transaction_id),
+        INDEX idx_variant_id (variant_id)
+    )""",
+    # As after create_report_rollups.sql and create_stock_escrow.sql
+    """CREATE TABLE product_sales_daily (
+        sale_date DATE NOT NULL,
+        variant_id INT NOT NULL,
+        slot TINYINT UNSIGNED NOT NULL DEFAULT 0,
+        quantity INT NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        cost DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (sale_date, variant_id, slot),
+        INDEX idx_variant_id (variant_id)
+    )""",
+)
+
+# The backfill from create_report_rollups.sql
+BUILD_ROLLUP_QUERY = """
+INSERT INTO product_sales_daily (sale_date, variant_id, quantity, revenue, cost)
+SELECT DATE(t.created_at), ti.variant_id,
+       SUM(ti.quantity),
+       SUM(ti.quantity * ti.unit_price),
+       SUM(ti.quantity * p.cost_price)
+FROM transaction_items ti
+JOIN transactions t ON t.transaction_id = ti.transaction_id
+JOIN product_variants v ON v.variant_id = ti.variant_id
+JOIN products p ON p.product_id = v.product_id
+GROUP BY DATE(t.created_at), ti.variant_id
+"""
+
+# What the report ran before the rollup existed
+NAIVE_QUERY = """
+SELECT ti.variant_id,
+       SUM(ti.quantity) AS quantity,
+       SUM(ti.quantity * ti.unit_price) AS revenue,
+       SUM(ti.quantity * p.cost_price) AS cost
+FROM transaction_items ti
+JOIN transactions t ON t.transaction_id = ti.transaction_id
+JOIN product_variants v ON v.variant_id = ti.variant_id
+JOIN products p ON p.product_id = v.product_id
+"""
+
+
+def seed(conn, n_items, n_variants, n_days, end, chunk=100_000, seed=42):
+    """Synthetic catalogue and sales over the n_days before `end`"""
+    rng = np.random.default_rng(seed)
+    cursor = conn.cursor()
+    for table in ('product_sales_daily', 'transaction_items', 'transactions', 'product_variants', 'products'):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    for ddl in SCHEMA_DDL:
+        cursor.execute(ddl)
+
+    # A few variants per product; prices per variant, costs per product
+    n_products = max(n_variants // 4, 1)
+    product_of = rng.integers(1, n_products + 1, n_variants)
+    cost_price = rng.uniform(3, 120, n_products + 1).round(2)
+    price = (cost_price[product_of] * rng.uniform(1.25, 2.5, n_variants)).round(2)
+    cursor.executemany(
+        "INSERT INTO products (product_id, cost_price) VALUES (%s, %s)",
+        [(p, float(cost_price[p])) for p in range(1, n_products + 1)]
+    )
+    cursor.executemany(
+        "INSERT INTO product_variants (variant_id, product_id) VALUES (%s, %s)",
+        [(v + 1, int(product_of[v])) for v in range(n_variants)]
+    )
+    conn.commit()
+
+    first_day = datetime.combine(end - timedelta(days=n_days), datetime.min.time())
+    tx_id = 0
+    for offset in range(0, n_items, chunk):
+        size = min(chunk, n_items - offset)
+        n_tx = max(size // 3, 1)
+        seconds = np.sort(rng.integers(0, n_days * 86400, n_tx))
+        cursor.executemany(
+            "INSERT INTO transactions (transaction_id, created_at) VALUES (%s, %s)",
+            [(tx_id + i + 1, first_day + timedelta(seconds=int(s))) for i, s in enumerate(seconds)]
+        )
+        # Skewed popularity so a few variants dominate, like real best sellers
+        variant = (rng.zipf(1.3, size) - 1) % n_variants
+        cursor.executemany(
+            "INSERT INTO transaction_items (transaction_id, variant_id, quantity, unit_price) VALUES (%s, %s, %s, %s)",
+            list(zip(
+                (tx_id + 1 + rng.integers(0, n_tx, size)).tolist(),
+                (variant + 1).tolist(),
+                rng.integers(1, 4, size).tolist(),
+                price[variant].tolist()
+            ))
+        )
+        conn.commit()
+        tx_id += n_tx
+        print(f"[INFO] Seeded {offset + size:,} / {n_items:,} line items...")
+
+    cursor.execute(BUILD_ROLLUP_QUERY)
+    conn.commit()
+    for table in ('transactions', 'transaction_items', 'product_sales_daily'):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+
+
+def run_report(conn, query, params):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.commit()
+    return rank_variants(rows, 'revenue', 10)
+
+
+def timed(conn, query, params, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        top = run_report(conn, query, params)
+        times.append(time.perf_counter() - started)
+    return min(times), statistics.median(times), top
+
+
+def compare(conn, label, start, end, repeat):
+    if start:
+        rollup_query = PRODUCT_PERFORMANCE_QUERY + " WHERE sale_date BETWEEN %s AND %s GROUP BY variant_id"
+        naive_query = NAIVE_QUERY + " WHERE t.created_at >= %s AND t.created_at < %s GROUP BY ti.variant_id"
+        rollup_params, naive_params = (start, end), (start, end + timedelta(days=1))
+    else:
+        rollup_query = PRODUCT_PERFORMANCE_QUERY + " GROUP BY variant_id"
+        naive_query = NAIVE_QUERY + " GROUP BY ti.variant_id"
+        rollup_params = naive_params = ()
+
+    naive_best, naive_median, naive_top = timed(conn, naive_query, naive_params, repeat)
+    rollup_best, rollup_median, rollup_top = timed(conn, rollup_query, rollup_params, repeat)
+    same = [r['variant_id'] for r in naive_top] == [r['variant_id'] for r in rollup_top]
+
+    print(f"[INFO] {label}")
+    print(f"  line item join : best {naive_best * 1000:9.1f} ms  median {naive_median * 1000:9.1f} ms")
+    print(f"  daily rollup   : best {rollup_best * 1000:9.1f} ms  median {rollup_median * 1000:9.1f} ms")
+    print(f"  speedup        : {naive_median / rollup_median:9.1f}x")
+    print(f"[{'OK' if same else 'ERROR'}] Top 10 {'matches' if same else 'differs'}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--schema', default=f"{os.getenv('DB_NAME', 'mobile_pos_system')}_perf_bench")
+    parser.add_argument('--items', type=int, default=5_000_000)
+    parser.add_argument('--variants', type=int, default=5_000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--range-days', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the data from the last run')
+    parser.add_argument('--drop', action='store_true', help='drop the scratch schema and exit')
+    args = parser.parse_args()
+
+    if not re.match(r'^\w+$', args.schema) or args.schema == os.getenv('DB_NAME'):
+        print(f"[ERROR] --schema must be a plain name other than DB_NAME, got {args.schema!r}")
+        return 2
+
+    conn = None
+    try:
+        conn = db.connect()
+        cursor = conn.cursor()
+        if args.drop:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{args.schema}`")
+            print(f"[OK] Dropped {args.schema}")
+            return 0
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.schema}`")
+        cursor.close()
+        conn.database = args.schema
+
+        end = date.today() - timedelta(days=1)
+        if not args.skip_seed:
+            print(f"[INFO] Seeding {args.items:,} line items over {args.days} days into {args.schema}...")
+            started = time.perf_counter()
+            seed(conn, args.items, args.variants, args.days, date.today())
+            print(f"[OK] Seeded in {time.perf_counter() - started:.0f}s")
+
+        ok = compare(conn, f"Last {args.range_days} days", end - timedelta(days=args.range_days - 1), end, args.repeat)
+        ok = compare(conn, "All time", None, None, args.repeat) and ok
+        print(f"[INFO] Drop the scratch data with: python {os.path.basename(__file__)} --drop")
+        return 0 if ok else 1
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+        return 2
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
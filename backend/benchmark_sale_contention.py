@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark: many terminals buying the same hot SKU at once.
+
+Runs real sales against the database in .env, so point DB_NAME at a scratch
+copy. Every basket contains the hot variant plus a few others in random
+order, which is what used to deadlock.
+
+    python benchmark_sale_contention.py --hot 12 --others 13,14,15
+    python benchmark_sale_contention.py --hot 12 --others 13,14,15 --legacy
+    python benchmark_sale_contention.py --hot 12 --others 13,14,15 --escrow
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+from datetime import datetime
+import mysql.connector
+from dotenv import load_dotenv
+
+import db
+from sales import (
+    configure_sale_session, is_retryable, record_sale, refill_escrow, with_retries
+)
+
+# Load environment variables
+load_dotenv()
+
+
+def legacy_sale(conn, user_id, data):
+    """The original create_sale: items in request order, insert before update, no retry"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """INSERT INTO transactions
+            (receipt_number, user_id, total_amount, cash_received, change_given)
+            VALUES (%s, %s, %s, %s, %s)""",
+            (f"REC-{datetime.now():%Y%m%d%H%M%S}-{random.randrange(16 ** 6):06X}", user_id,
+             data['total_amount'], data['cash_received'], 0)
+        )
+        transaction_id = cursor.lastrowid
+        for item in data['items']:
+            cursor.execute(
+                "INSERT INTO transaction_items (transaction_id, variant_id, quantity, unit_price) VALUES (%s, %s, %s, %s)",
+                (transaction_id, item['variant_id'], item['quantity'], item['unit_price'])
+            )
+            cursor.execute(
+                "UPDATE product_variants SET current_stock = current_stock - %s WHERE variant_id = %s",
+                (item['quantity'], item['variant_id'])
+            )
+        conn.commit()
+        return transaction_id
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def make_basket(hot, others):
+    variants = [hot] + random.sample(others, k=random.randint(0, len(others)))
+    random.shuffle(variants)
+    items = [{'variant_id': v, 'quantity': 1, 'unit_price': 1.0} for v in variants]
+    return {'items': items, 'total_amount': float(len(items)), 'cash_received': float(len(items))}
+
+
+def terminal(args, escrow, stats, lock):
+    conn = db.connect()
+    configure_sale_session(conn)
+    latencies, retries, failures = [], 0, 0
+
+    def count_retry(err, attempt):
+        nonlocal retries
+        retries += 1
+
+    for _ in range(args.sales):
+        basket = make_basket(args.hot, args.others)
+        started = time.perf_counter()
+        try:
+            if args.legacy:
+                legacy_sale(conn, args.user_id, basket)
+            else:
+                with_retries(lambda: record_sale(conn, args.user_id, basket, escrow), on_retry=count_retry)
+            latencies.append(time.perf_counter() - started)
+        except mysql.connector.Error as err:
+            if not is_retryable(err):
+                raise
+            failures += 1
+    conn.close()
+
+    with lock:
+        stats['latencies'].extend(latencies)
+        stats['retries'] += retries
+        stats['failures'] += failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hot', type=int, required=True, help='variant_id of the hot SKU')
+    parser.add_argument('--others', default='', help='comma separated variant_ids mixed into baskets')
+    parser.add_argument('--terminals', type=int, default=32)
+    parser.add_argument('--sales', type=int, default=50, help='sales per terminal')
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--legacy', action='store_true', help='use the original unordered, non-retrying sale path')
+    parser.add_argument('--escrow', action='store_true', help='sell the hot SKU from escrow slots')
+    parser.add_argument('--slots', type=int, default=16)
+    args = parser.parse_args()
+    args.others = [int(v) for v in args.others.split(',') if v]
+
+    escrow = frozenset()
+    stop = threading.Event()
+    if args.escrow:
+        escrow = frozenset({args.hot})
+        refill_conn = db.connect()
+        refill_escrow(refill_conn, args.hot, args.slots, args.terminals * args.sales)
+
+        def keep_refilled():
+            while not stop.wait(0.5):
+                with_retries(lambda: refill_escrow(refill_conn, args.hot, args.slots, args.terminals * args.sales))
+        threading.Thread(target=keep_refilled, daemon=True).start()
+
+    stats = {'latencies': [], 'retries': 0, 'failures': 0}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=terminal, args=(args, escrow, stats, lock)) for _ in range(args.terminals)]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+
+    latencies = sorted(stats['latencies'])
+    mode = 'legacy' if args.legacy else 'escrow' if args.escrow else 'ordered+retry'
+    print(f"[INFO] {mode}: {args.terminals} terminals x {args.sales} sales")
+    print(f"  completed  : {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} sales/s)")
+    print(f"  failed     : {stats['failures']} (deadlock / lock wait timeout)")
+    print(f"  retries    : {stats['retries']}")
+    if latencies:
+        p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        print(f"  latency ms : p50 {statistics.median(latencies) * 1000:.1f}  p95 {p(0.95):.1f}  p99 {p(0.99):.1f}")
+
+
+if __name__ == "__main__":
+    main()
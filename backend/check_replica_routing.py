@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Check read routing against a real primary and replica.
+
+Needs the primary from .env and a replica of it, e.g. a second local MySQL
+instance replicating from the first. The DB user needs REPLICATION CLIENT on
+the replica (for the lag check), and --user-id must be an active user.
+
+    DB_REPLICAS=127.0.0.1:3307 python check_replica_routing.py --user-id 1
+    DB_REPLICAS=127.0.0.1:3307 python check_replica_routing.py --user-id 1 --stop-replica
+
+Checks:
+  routing            reads go to the replica; db_route('primary') and reads
+                     outside a request go to the primary
+  read-your-writes   after a write the user's reads use the primary, also in
+                     another worker, until the pin expires
+  lag fallback       replicas over the lag limit, unreachable or (with
+                     --stop-replica) not replicating are skipped in time
+
+Creates and drops the table replica_routing_check on the primary. Exits 1 if
+any check fails.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+os.environ.setdefault('LOG_FILE', os.devnull)
+
+import mysql.connector
+from flask import g
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+
+import clessaapp
+import db
+
+SERVER_ID_QUERY = "SELECT @@server_id AS server_id"
+
+failures = []
+
+
+def check(name, ok, detail=''):
+    print(f"[{'OK' if ok else 'ERROR'}] {name}" + (f" ({detail})" if detail else ''))
+    if not ok:
+        failures.append(name)
+
+
+def server_id(conn):
+    cursor = conn.cursor()
+    cursor.execute(SERVER_ID_QUERY)
+    value = cursor.fetchone()[0]
+    cursor.close()
+    return value
+
+
+def routed_read(app, headers, query=SERVER_ID_QUERY, route=None):
+    """Run one read through execute_query inside an authenticated request"""
+    with app.test_request_context(headers=headers):
+        verify_jwt_in_request()
+        if route:
+            g.db_route = route
+        row = db.execute_query(query, fetch_one=True)
+        return next(iter(row.values()))
+
+
+def routed_write(app, headers, query, params):
+    with app.test_request_context(headers=headers):
+        verify_jwt_in_request()
+        db.execute_query(query, params)
+
+
+def wait_for_replica_table(replica, timeout=10):
+    """Wait until the scratch table has replicated"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        conn = db.connect(*replica)
+        cursor = conn.cursor()
+        cursor.execute("SHOW TABLES LIKE 'replica_routing_check'")
+        found = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        if found:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def set_replication(replica, running):
+    conn = db.connect(*replica)
+    cursor = conn.cursor()
+    statement = "START REPLICA SQL_THREAD" if running else "STOP REPLICA SQL_THREAD"
+    try:
+        cursor.execute(statement)
+    except mysql.connector.Error:
+        # MySQL < 8.0.22
+        cursor.execute(statement.replace('REPLICA', 'SLAVE'))
+    cursor.close()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', type=int, required=True, help='an active user on the primary')
+    parser.add_argument('--pin-seconds', type=float, default=2)
+    parser.add_argument('--stop-replica', action='store_true',
+                        help='also stop and restart the replica SQL thread')
+    args = parser.parse_args()
+
+    hosts = db.parse_hosts(os.getenv('DB_REPLICAS'))
+    if not hosts:
+        print("[ERROR] Set DB_REPLICAS, e.g. DB_REPLICAS=127.0.0.1:3307")
+        return 2
+    replica = hosts[0]
+
+    try:
+        primary_conn, replica_conn = db.connect(), db.connect(*replica, timeout=2)
+        primary_id, replica_id = server_id(primary_conn), server_id(replica_conn)
+        replica_conn.close()
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+        return 2
+    if primary_id == replica_id:
+        print(f"[ERROR] Primary and {replica[0]}:{replica[1]} report the same server_id {primary_id}")
+        return 2
+    print(f"[INFO] primary server_id {primary_id}, replica {replica[0]}:{replica[1]} server_id {replica_id}")
+
+    app = clessaapp.create_app()
+    with app.app_context():
+        token = create_access_token(identity={'user_id': args.user_id, 'role': 'check', 'email': 'check'})
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Fresh state: lag checked on every read, pins in a private scratch directory
+    db._replicas = db.ReplicaSet(hosts, max_lag=float(os.getenv('DB_REPLICA_MAX_LAG', 2)), check_interval=0)
+    pin_dir = tempfile.mkdtemp(prefix='replica-check-pins-')
+    db._pins = db.PrimaryPins(seconds=args.pin_seconds, shared_dir=pin_dir)
+
+    cursor = primary_conn.cursor()
+    try:
+        cursor.execute("CREATE TABLE IF NOT EXISTS replica_routing_check (id INT PRIMARY KEY, value BIGINT NOT NULL)")
+        cursor.execute("REPLACE INTO replica_routing_check (id, value) VALUES (1, 0)")
+        primary_conn.commit()
+        if not wait_for_replica_table(replica):
+            print("[ERROR] replica_routing_check did not reach the replica within 10s; is it replicating?")
+            return 2
+
+        # Routing
+        check("read routed to replica", routed_read(app, headers) == replica_id)
+        check("db_route('replica') read on replica", routed_read(app, headers, route='replica') == replica_id)
+        check("db_route('primary') read on primary", routed_read(app, headers, route='primary') == primary_id)
+        check("read outside a request on primary", db.execute_query(SERVER_ID_QUERY, fetch_one=True)['server_id'] == primary_id)
+
+        # Read-your-writes, with the follow-up read in a "different worker"
+        stamp = time.time_ns()
+        routed_write(app, headers, "UPDATE replica_routing_check SET value = %s WHERE id = 1", (stamp,))
+        db._pins = db.PrimaryPins(seconds=args.pin_seconds, shared_dir=pin_dir)
+        check("read after write on primary (other worker)", routed_read(app, headers) == primary_id)
+        value = routed_read(app, headers, "SELECT value FROM replica_routing_check WHERE id = 1")
+        check("read after write sees the write", value == stamp, f"got {value}, wrote {stamp}")
+        time.sleep(args.pin_seconds + 0.2)
+        check("read after pin expiry on replica", routed_read(app, headers) == replica_id)
+
+        # Lag fallback
+        db._replicas = db.ReplicaSet(hosts, max_lag=-1, check_interval=0)
+        check("replica over lag limit skipped", routed_read(app, headers) == primary_id)
+
+        db._replicas = db.ReplicaSet([('127.0.0.1', 1)], check_interval=0, connect_timeout=1)
+        started = time.perf_counter()
+        fallback = routed_read(app, headers)
+        elapsed = time.perf_counter() - started
+        check("unreachable replica skipped", fallback == primary_id)
+        check("unreachable replica skipped quickly", elapsed < 2.5, f"{elapsed:.1f}s")
+
+        if args.stop_replica:
+            db._replicas = db.ReplicaSet(hosts, check_interval=0)
+            set_replication(replica, running=False)
+            try:
+                check("stopped replica skipped", routed_read(app, headers) == primary_id)
+            finally:
+                set_replication(replica, running=True)
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+        return 2
+    finally:
+        cursor.execute("DROP TABLE IF EXISTS replica_routing_check")
+        primary_conn.commit()
+        cursor.close()
+        primary_conn.close()
+
+    if failures:
+        print(f"[ERROR] {len(failures)} check(s) failed")
+        return 1
+    print("[OK] Replica routing behaves as expected")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup time budget for the web app and the maintenance CLI.
+
+Each measurement runs in a fresh interpreter (best of --runs) so nothing is
+already imported. Fails with exit code 1 when a budget is exceeded, or when
+importing manage.py pulls in Flask.
+
+    python check_startup_time.py
+    STARTUP_IMPORT_BUDGET_MS=600 python check_startup_time.py --runs 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+{setup}
+created = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'setup_ms': (created - imported) * 1000,
+    'flask_loaded': 'flask' in sys.modules,
+}}))
+"""
+
+
+def probe(module, setup='pass'):
+    env = dict(os.environ, LOG_FILE=os.devnull)
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, setup=setup)],
+        cwd=HERE, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def best_of(runs, module, setup='pass'):
+    results = [probe(module, setup) for _ in range(runs)]
+    return {
+        'import_ms': min(r['import_ms'] for r in results),
+        'setup_ms': min(r['setup_ms'] for r in results),
+        'flask_loaded': any(r['flask_loaded'] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    budgets = {
+        'import clessaapp': float(os.getenv('STARTUP_IMPORT_BUDGET_MS', 800)),
+        'create_app()': float(os.getenv('STARTUP_CREATE_APP_BUDGET_MS', 300)),
+        'import manage': float(os.getenv('STARTUP_CLI_BUDGET_MS', 300)),
+    }
+
+    app = best_of(args.runs, 'clessaapp', 'clessaapp.create_app()')
+    cli = best_of(args.runs, 'manage')
+    measured = {
+        'import clessaapp': app['import_ms'],
+        'create_app()': app['setup_ms'],
+        'import manage': cli['import_ms'],
+    }
+
+    failed = False
+    for name, value in measured.items():
+        ok = value <= budgets[name]
+        failed = failed or not ok
+        print(f"[{'OK' if ok else 'ERROR'}] {name:<17} {value:7.1f} ms (budget {budgets[name]:.0f} ms)")
+
+    if cli['flask_loaded']:
+        failed = True
+        print("[ERROR] importing manage loads Flask")
+    else:
+        print("[OK] manage imports without Flask")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import os
 import mysql.connector
-from flask import Flask, request, jsonify, make_response
+from flask import (
+    Blueprint, Flask, current_app, request, jsonify, make_response, g, has_request_context
+)
 from flask_bcrypt import Bcrypt
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -11,89 +13,239 @@ from flask_jwt_extended import (
     get_jwt_identity, create_refresh_token
 )
 from functools import wraps
-import logging
-from logging.handlers import RotatingFileHandler
+import threading
+import time
 from dotenv import load_dotenv
 import re
 from datetime import timedelta, datetime
 import uuid
 import json
+from reports import (
+    PRODUCT_PERFORMANCE_QUERY, PERFORMANCE_SORT_KEYS,
+    VALUATION_VARIANT_DELTA_QUERY, VALUATION_PRODUCT_QUERY,
+    INVENTORY_REPORT_QUERY, DAILY_SALES_QUERY, ARCHIVED_SALES_QUERY,
+    VARIANT_STOCK, VARIANT_STOCK_JOIN, rank_variants, sell_through
+)
+from sales import (
+    record_sale, with_retries, configure_sale_session, release_escrow,
+    lock_product_stock, escrow_variants_from_env
+)
+from archive import ARCHIVE_NAME, ARCHIVE_BOUNDARY_QUERY, split_range
+import db
+from db import execute_query
+from app_logging import configure_logging
+from identity_cache import IdentityCache
+from reorder import REORDER_POINTS_PAGE_QUERY, BELOW_REORDER_POINT_CLAUSE
+from password_reset import issue_token, consume_token
+from audit import AUDIT_PAGE_QUERY, AUDIT_AFTER_CLAUSE, encode_cursor, decode_cursor
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Flask app
-app = Flask(__name__)
+# Extensions are created unbound and attached in create_app(), so importing
+# this module (gunicorn --preload, the startup budget check) stays cheap.
+talisman = Talisman()
+bcrypt = Bcrypt()
+jwt = JWTManager()
+limiter = Limiter(key_func=get_remote_address)
+
+api = Blueprint('api', __name__)
 
 # ========================
-# Security Configuration
+# Application Factory
 # ========================
-app.config.update({
-    'SECRET_KEY': os.getenv('SECRET_KEY'),
-    'JWT_SECRET_KEY': os.getenv('JWT_SECRET'),
-    'JWT_ACCESS_TOKEN_EXPIRES': timedelta(hours=1),
-    'JWT_REFRESH_TOKEN_EXPIRES': timedelta(days=30),
-    'RATELIMIT_DEFAULT': '200 per day;50 per hour',
-    'SECURITY_PASSWORD_SALT': os.getenv('PASSWORD_RESET_SALT'),
-})
-
-# Security middleware
-Talisman(app, 
-    force_https=False,
-    strict_transport_security=False,
-    session_cookie_secure=False,
-    content_security_policy={
-        'default-src': "'self'",
-        'script-src': ["'self'", "'unsafe-inline'"],
-        'style-src': ["'self'", "'unsafe-inline'"]
-    }
-)
-CORS(app, supports_credentials=True, origins="*")
+def create_app(config=None):
+    """Build the Flask app; `config` overrides the environment-based defaults"""
+    app = Flask(__name__)
+    
+    # ========================
+    # Security Configuration
+    # ========================
+    app.config.update({
+        'SECRET_KEY': os.getenv('SECRET_KEY'),
+        'JWT_SECRET_KEY': os.getenv('JWT_SECRET'),
+        'JWT_ACCESS_TOKEN_EXPIRES': timedelta(hours=1),
+        'JWT_REFRESH_TOKEN_EXPIRES': timedelta(days=30),
+        'RATELIMIT_DEFAULT': '200 per day;50 per hour',
+        'SECURITY_PASSWORD_SALT': os.getenv('PASSWORD_RESET_SALT'),
+    })
+    if config:
+        app.config.update(config)
+    
+    # Security middleware
+    talisman.init_app(app, 
+        force_https=False,
+        strict_transport_security=False,
+        session_cookie_secure=False,
+        content_security_policy={
+            'default-src': "'self'",
+            'script-src': ["'self'", "'unsafe-inline'"],
+            'style-src': ["'self'", "'unsafe-inline'"]
+        }
+    )
+    CORS(app, supports_credentials=True, origins="*")
+    
+    # Initialize extensions
+    bcrypt.init_app(app)
+    jwt.init_app(app)
+    limiter.init_app(app)
+    
+    # Structured JSON logs written by a background thread (see app_logging.py)
+    configure_logging(app.logger)
+    
+    # Request-aware routing and timing for the shared DB layer
+    db.set_hooks(
+        use_replica=_use_replica,
+        may_coalesce=_may_coalesce,
+        after_write=_after_write,
+        record_timing=_record_db_timing
+    )
+    
+    app.register_blueprint(api)
+    return app
 
-# Initialize extensions
-bcrypt = Bcrypt(app)
-jwt = JWTManager(app)
-limiter = Limiter(app, key_func=get_remote_address)
+@api.before_app_request
+def start_request_timer():
+    g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    g.request_started = time.perf_counter()
+    g.db_time = 0.0
+    g.db_queries = 0
+
+@api.after_app_request
+def log_request(response):
+    started = g.get('request_started')
+    if started is not None:
+        current_app.logger.info(
+            "request",
+            extra={
+                'event': 'request',
+                'method': request.method,
+                'status': response.status_code,
+                'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+                'db_ms': round(g.db_time * 1000, 2),
+                'db_queries': g.db_queries,
+                'ip': request.remote_addr,
+            }
+        )
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    return response
 
 # ========================
 # Database Connection
 # ========================
+# Ultra-hot variants whose sales draw from variant_stock_escrow slots
+ESCROW_VARIANTS = escrow_variants_from_env()
+
 def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv('DB_HOST'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD'),
-        database=os.getenv('DB_NAME')
-    )
+    return db.connect()
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=False, lastrowid=False):
-    """Safe query execution with parameterized queries"""
-    conn = None
+def db_route(target):
+    """Per-endpoint routing hint for read queries.
+    
+    'replica': reads may be stale (reports); ignores read-your-writes pins.
+    'primary': every query goes to the primary (auth, anything security related).
+    Endpoints without a hint send reads to a replica unless the user is pinned.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            g.db_route = target
+            return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _current_user_id():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, params or ())
-        
-        if fetch_one:
-            result = cursor.fetchone()
-        elif fetch_all:
-            result = cursor.fetchall()
-        elif lastrowid:
-            result = cursor.lastrowid
-        else:
-            result = None
-        
-        conn.commit()
-        return result
-    except Exception as e:
-        if conn:
-            conn.rollback()
-        app.logger.error(f"Database error: {str(e)}")
-        raise
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        identity = get_jwt_identity()
+    except RuntimeError:
+        return None
+    return identity.get('user_id') if isinstance(identity, dict) else None
+
+def pin_reads_to_primary():
+    """Call after a committed write so this user's next reads see it.
+    
+    The pin lasts DB_READ_YOUR_WRITES_SECONDS and is visible to every worker
+    on the host, so the next request lands on the primary wherever it runs.
+    """
+    g.db_wrote = True
+    user_id = _current_user_id()
+    if user_id is not None:
+        db.get_pins().pin(user_id)
+
+def _use_replica():
+    if not has_request_context() or not db.get_replicas():
+        return False
+    route = g.get('db_route')
+    if route in ('primary', 'replica'):
+        return route == 'replica'
+    if g.get('db_wrote'):
+        return False
+    user_id = _current_user_id()
+    return user_id is None or not db.get_pins().is_pinned(user_id)
+
+def _may_coalesce():
+    """A shared result may predate this user's own write, so don't share one"""
+    if not has_request_context():
+        return True
+    if g.get('db_wrote'):
+        return False
+    user_id = _current_user_id()
+    return user_id is None or not db.get_pins().is_pinned(user_id)
+
+def _after_write():
+    if has_request_context():
+        pin_reads_to_primary()
+
+def _record_db_timing(seconds):
+    if has_request_context():
+        g.db_time = g.get('db_time', 0.0) + seconds
+        g.db_queries = g.get('db_queries', 0) + 1
+
+# ========================
+# Identity Cache
+# ========================
+# Current role and active flag per user, checked on every authenticated
+# request instead of trusting the values minted into the token
+_identity_cache = None
+_identity_cache_lock = threading.Lock()
+
+def get_identity_cache():
+    global _identity_cache
+    if _identity_cache is None:
+        with _identity_cache_lock:
+            if _identity_cache is None:
+                _identity_cache = IdentityCache.from_env()
+    return _identity_cache
+
+def _load_identity(user_id):
+    return execute_query(
+        "SELECT user_id, email, role, is_active FROM users WHERE user_id = %s",
+        (user_id,),
+        fetch_one=True,
+        primary=True
+    )
+
+def current_identity():
+    """Cached users row (user_id, email, role, is_active) for the request's token"""
+    if 'identity' not in g:
+        token_identity = get_jwt_identity()
+        user_id = token_identity.get('user_id') if isinstance(token_identity, dict) else None
+        g.identity = get_identity_cache().get(user_id, _load_identity) if user_id is not None else None
+    return g.identity
+
+def invalidate_identity(user_id):
+    """Call after committing a change to a user's role or active flag (best effort)"""
+    return get_identity_cache().invalidate(user_id)
+
+@jwt.token_in_blocklist_loader
+def check_token_revoked(jwt_header, jwt_payload):
+    """Reject tokens of users that were deactivated or deleted since they were issued"""
+    token_identity = jwt_payload.get(current_app.config['JWT_IDENTITY_CLAIM'])
+    user_id = token_identity.get('user_id') if isinstance(token_identity, dict) else None
+    if user_id is None:
+        return True
+    g.identity = get_identity_cache().get(user_id, _load_identity)
+    return not (g.identity and g.identity['is_active'])
 
 # ========================
 # Security Utilities
@@ -109,8 +261,7 @@ def role_required(role):
         @wraps(f)
         @jwt_required()
         def wrapper(*args, **kwargs):
-            current_user = get_jwt_identity()
-            if current_user['role'] != role:
+            if current_identity()['role'] != role:
                 return jsonify({"error": "Insufficient permissions"}), 403
             return f(*args, **kwargs)
         return wrapper
@@ -130,13 +281,14 @@ def log_security_action(user_id, action, request):
         )
     except Exception as e:
         # If audit_log table doesn't exist, log to app logger instead
-        app.logger.warning(f"Audit logging failed: {str(e)}. Action: {action}, User: {user_id}")
+        current_app.logger.warning(f"Audit logging failed: {str(e)}. Action: {action}, User: {user_id}")
 
 # ========================
 # Authentication Endpoints
 # ========================
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/api/auth/login', methods=['POST'])
 @limiter.limit('5 per minute')
+@db_route('primary')
 def login():
     """Secure login with email and rate limiting"""
     data = request.get_json()
@@ -147,13 +299,23 @@ def login():
     if not validate_input(data.get('password'), r'^.{6,50}$'):
         return jsonify({"error": "Password must be 6-50 characters"}), 400
     
+    # Stamp before reading: a role change committed meanwhile invalidates the
+    # cached row instead of being overwritten by it
+    loaded_at = time.time_ns()
     user = execute_query(
         "SELECT * FROM users WHERE email = %s",
         (data['email'],),
-        fetch_one=True
+        fetch_one=True,
+        primary=True
     )
     
-    if user and bcrypt.check_password_hash(user['password_hash'], data['password']):
+    if user and user['is_active'] and bcrypt.check_password_hash(user['password_hash'], data['password']):
+        get_identity_cache().put(user['user_id'], {
+            'user_id': user['user_id'],
+            'email': user['email'],
+            'role': user['role'],
+            'is_active': user['is_active']
+        }, loaded_at)
         access_token = create_access_token(identity={
             'user_id': user['user_id'],
             'role': user['role'],
@@ -177,13 +339,15 @@ def login():
         })
     
     log_security_action(None, "login_failed", request)
+    current_app.logger.info("login_failed", extra={'event': 'login_failed', 'ip': request.remote_addr})
     return jsonify({"error": "Invalid credentials"}), 401
 
-@app.route('/api/auth/refresh', methods=['POST'])
+@api.route('/api/auth/refresh', methods=['POST'])
 @jwt_required(refresh=True)
+@db_route('primary')
 def refresh():
-    """Refresh access token"""
-    current_user = get_jwt_identity()
+    """Refresh access token with the user's current role"""
+    current_user = current_identity()
     new_token = create_access_token(identity={
         'user_id': current_user['user_id'],
         'role': current_user['role'],
@@ -191,12 +355,23 @@ def refresh():
     })
     return jsonify({'access_token': new_token})
 
-@app.route('/api/auth/request-password-reset', methods=['POST'])
+def _reset_email_key():
+    """Rate limit key for reset requests: the target address, whatever the client IP"""
+    email = (request.get_json(silent=True) or {}).get('email')
+    return f"password-reset:{str(email or '').strip().lower()}"
+
+@api.route('/api/auth/request-password-reset', methods=['POST'])
+@limiter.limit('5 per hour')
+@limiter.limit('3 per hour', key_func=_reset_email_key)
+@db_route('primary')
 def request_password_reset():
     """Initiate password reset process"""
     email = request.json.get('email')
     if not email:
         return jsonify({"error": "Email is required"}), 400
+    
+    if not validate_input(email, r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'):
+        return jsonify({"error": "Invalid email format"}), 400
 
     user = execute_query(
         "SELECT user_id, email FROM users WHERE email = %s",
@@ -205,15 +380,12 @@ def request_password_reset():
     )
     
     if user:
-        token = str(uuid.uuid4())
-        expires_at = datetime.utcnow() + timedelta(hours=1)
-        
-        execute_query(
-            """INSERT INTO password_reset_tokens 
-            (user_id, token, expires_at)
-            VALUES (%s, %s, %s)""",
-            (user['user_id'], token, expires_at)
-        )
+        # Only the token's hash is stored; older tokens over the per-user cap are replaced
+        conn = get_db_connection()
+        try:
+            token = issue_token(conn, user['user_id'])
+        finally:
+            conn.close()
         
         # In production: Send email with reset link
         reset_link = f"{request.host_url}reset-password?token={token}"
@@ -223,7 +395,9 @@ def request_password_reset():
     
     return jsonify({"message": "If the email exists, a reset link has been sent"}), 200
 
-@app.route('/api/auth/reset-password', methods=['POST'])
+@api.route('/api/auth/reset-password', methods=['POST'])
+@limiter.limit('10 per minute')
+@db_route('primary')
 def reset_password():
     """Complete password reset"""
     token = request.json.get('token')
@@ -235,35 +409,25 @@ def reset_password():
     if not validate_input(new_password, r'^.{8,50}$'):
         return jsonify({"error": "Password must be 8-50 characters"}), 400
     
-    reset_token = execute_query(
-        """SELECT * FROM password_reset_tokens 
-        WHERE token = %s AND used = FALSE AND expires_at > UTC_TIMESTAMP()""",
-        (token,),
-        fetch_one=True
-    )
-    
-    if not reset_token:
-        return jsonify({"error": "Invalid or expired token"}), 400
-    
+    # Password update and token removal commit together; the user's other tokens go too
     hashed_password = bcrypt.generate_password_hash(new_password).decode('utf-8')
-    execute_query(
-        "UPDATE users SET password_hash = %s WHERE user_id = %s",
-        (hashed_password, reset_token['user_id'])
-    )
+    conn = get_db_connection()
+    try:
+        user_id = consume_token(conn, str(token), hashed_password)
+    finally:
+        conn.close()
     
-    execute_query(
-        "UPDATE password_reset_tokens SET used = TRUE WHERE token_id = %s",
-        (reset_token['token_id'],)
-    )
+    if user_id is None:
+        return jsonify({"error": "Invalid or expired token"}), 400
     
-    log_security_action(reset_token['user_id'], "password_reset_complete", request)
+    log_security_action(user_id, "password_reset_complete", request)
     
     return jsonify({"message": "Password updated successfully"}), 200
 
 # ========================
 # Product Endpoints
 # ========================
-@app.route('/api/products', methods=['GET'])
+@api.route('/api/products', methods=['GET'])
 @jwt_required()
 def get_products():
     """Get all products with search"""
@@ -280,7 +444,7 @@ def get_products():
     products = execute_query(query, params, fetch_all=True)
     return jsonify(products)
 
-@app.route('/api/products/<int:product_id>', methods=['GET'])
+@api.route('/api/products/<int:product_id>', methods=['GET'])
 @jwt_required()
 def get_product(product_id):
     """Get single product"""
@@ -293,7 +457,7 @@ def get_product(product_id):
         return jsonify({"error": "Product not found"}), 404
     return jsonify(product)
 
-@app.route('/api/products', methods=['POST'])
+@api.route('/api/products', methods=['POST'])
 @role_required('admin')
 def create_product():
     """Create new product (Admin only)"""
@@ -318,26 +482,198 @@ def create_product():
     except mysql.connector.Error as err:
         return jsonify({"error": str(err)}), 400
 
+PRODUCT_UPDATE_FIELDS = (
+    'name', 'description', 'category', 'base_price', 'cost_price', 'supplier_id', 'image_url'
+)
+
+@api.route('/api/products/<int:product_id>', methods=['PUT'])
+@role_required('admin')
+def update_product(product_id):
+    """Update product details and prices (Admin only)"""
+    data = request.get_json() or {}
+    updates = {field: data[field] for field in PRODUCT_UPDATE_FIELDS if field in data}
+    if not updates:
+        return jsonify({"error": "No fields to update"}), 400
+    
+    def apply_update(conn):
+        cursor = conn.cursor(dictionary=True)
+        try:
+            # Stock rows before the product row, as in a sale, so edits queue behind checkouts
+            if not lock_product_stock(cursor, product_id):
+                conn.rollback()
+                return False
+            
+            # Move the product's stock value out of the old category/prices and back in
+            cursor.execute(VALUATION_PRODUCT_QUERY, (-1, -1, -1, product_id))
+            cursor.execute(
+                f"UPDATE products SET {', '.join(f'{field} = %s' for field in updates)} WHERE product_id = %s",
+                (*updates.values(), product_id)
+            )
+            cursor.execute(VALUATION_PRODUCT_QUERY, (1, 1, 1, product_id))
+            conn.commit()
+            return True
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        configure_sale_session(conn)
+        # Anything still racing the lock order (e.g. a variant added meanwhile) is retried
+        if not with_retries(lambda: apply_update(conn)):
+            return jsonify({"error": "Product not found"}), 404
+        pin_reads_to_primary()
+        return jsonify({"message": "Product updated"})
+    except mysql.connector.Error as err:
+        return jsonify({"error": str(err)}), 400
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
 # ========================
 # Inventory Endpoints
 # ========================
-@app.route('/api/inventory', methods=['GET'])
+@api.route('/api/inventory', methods=['GET'])
 @jwt_required()
 def get_inventory():
     """Get inventory with variants"""
-    query = """
-    SELECT p.*, v.variant_id, v.color, v.model_compatibility, v.current_stock, v.low_stock_threshold
+    query = f"""
+    SELECT p.*, v.variant_id, v.color, v.model_compatibility,
+           {VARIANT_STOCK} AS current_stock, v.low_stock_threshold
     FROM products p
     LEFT JOIN product_variants v ON p.product_id = v.product_id
+    {VARIANT_STOCK_JOIN}
     WHERE p.is_active = TRUE
     """
-    inventory = execute_query(query, fetch_all=True)
+    inventory = execute_query(query, fetch_all=True, coalesce=True)
     return jsonify(inventory)
 
+@api.route('/api/inventory/variants', methods=['POST'])
+@role_required('admin')
+def create_product_variant():
+    """Add a variant with its opening stock (Admin only)"""
+    data = request.get_json() or {}
+    if 'product_id' not in data or not isinstance(data.get('current_stock', 0), int):
+        return jsonify({"error": "Missing or invalid fields"}), 400
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        cursor.execute(
+            """INSERT INTO product_variants 
+            (product_id, color, model_compatibility, current_stock, low_stock_threshold)
+            VALUES (%s, %s, %s, %s, %s)""",
+            (
+                data['product_id'], data.get('color'), data.get('model_compatibility'),
+                data.get('current_stock', 0), data.get('low_stock_threshold', 5)
+            )
+        )
+        variant_id = cursor.lastrowid
+        
+        stock = data.get('current_stock', 0)
+        if stock:
+            cursor.execute(VALUATION_VARIANT_DELTA_QUERY, (stock, stock, stock, variant_id))
+        
+        conn.commit()
+        pin_reads_to_primary()
+        return jsonify({"variant_id": variant_id}), 201
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return jsonify({"error": str(err)}), 400
+    finally:
+        if conn and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+@api.route('/api/inventory/<int:variant_id>', methods=['PUT'])
+@role_required('admin')
+def update_inventory(variant_id):
+    """Adjust stock level and threshold for a variant (Admin only)"""
+    data = request.get_json() or {}
+    if not isinstance(data.get('current_stock'), int):
+        return jsonify({"error": "current_stock must be an integer"}), 400
+    
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        
+        # An absolute stock count replaces escrowed stock too
+        release_escrow(cursor, variant_id)
+        cursor.execute(
+            "SELECT current_stock, low_stock_threshold FROM product_variants WHERE variant_id = %s FOR UPDATE",
+            (variant_id,)
+        )
+        variant = cursor.fetchone()
+        if not variant:
+            return jsonify({"error": "Variant not found"}), 404
+        
+        cursor.execute(
+            """UPDATE product_variants 
+            SET current_stock = %s, low_stock_threshold = %s 
+            WHERE variant_id = %s""",
+            (
+                data['current_stock'],
+                data.get('low_stock_threshold', variant['low_stock_threshold']),
+                variant_id
+            )
+        )
+        
+        delta = data['current_stock'] - variant['current_stock']
+        if delta:
+            cursor.execute(VALUATION_VARIANT_DELTA_QUERY, (delta, delta, delta, variant_id))
+        
+        conn.commit()
+        pin_reads_to_primary()
+        log_security_action(get_jwt_identity()['user_id'], f"inventory_adjustment:{variant_id}:{delta:+d}", request)
+        return jsonify({"message": "Inventory updated"})
+    except mysql.connector.Error as err:
+        if conn:
+            conn.rollback()
+        return jsonify({"error": str(err)}), 400
+    finally:
+        if conn and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+@api.route('/api/inventory/reorder-points', methods=['GET'])
+@role_required('admin')
+@db_route('replica')
+def get_reorder_points():
+    """Suggested reorder points from compute_reorder_points.py (Admin only)
+    
+    Keyset-paginated by variant_id; the cursor for the next page is returned in
+    the X-Next-Cursor header. below=true lists only variants at or under their
+    reorder point.
+    """
+    limit = request.args.get('limit', 100, type=int)
+    after = request.args.get('cursor', 0, type=int)
+    below = request.args.get('below', 'false').lower() == 'true'
+    
+    if not limit or not 1 <= limit <= 500:
+        return jsonify({"error": "Limit must be between 1 and 500"}), 400
+    
+    rows = execute_query(
+        REORDER_POINTS_PAGE_QUERY.format(below=BELOW_REORDER_POINT_CLAUSE if below else ''),
+        (after, limit + 1),
+        fetch_all=True
+    )
+    
+    response = make_response(jsonify(rows[:limit]))
+    if len(rows) > limit:
+        response.headers['X-Next-Cursor'] = str(rows[limit - 1]['variant_id'])
+    return response
+
 # ========================
 # Sales Endpoints
 # ========================
-@app.route('/api/sales', methods=['POST'])
+@api.route('/api/sales', methods=['POST'])
 @jwt_required()
 def create_sale():
     """Process a new sale"""
@@ -346,110 +682,236 @@ def create_sale():
     if not all(field in data for field in required_fields):
         return jsonify({"error": "Missing required fields"}), 400
     
+    conn = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Create transaction
-        cursor.execute(
-            """INSERT INTO transactions 
-            (receipt_number, user_id, total_amount, cash_received, change_given, customer_phone, customer_email)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (
-                f"REC-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                get_jwt_identity()['user_id'],
-                data['total_amount'],
-                data['cash_received'],
-                data['cash_received'] - data['total_amount'],
-                data.get('customer_phone'),
-                data.get('customer_email')
+        configure_sale_session(conn)
+        transaction_id = with_retries(
+            lambda: record_sale(conn, get_jwt_identity()['user_id'], data, ESCROW_VARIANTS),
+            on_retry=lambda err, attempt: current_app.logger.warning(
+                f"Sale retry {attempt + 1} after lock error: {err}"
             )
         )
-        transaction_id = cursor.lastrowid
-        
-        # Add items and update stock
-        for item in data['items']:
-            cursor.execute(
-                """INSERT INTO transaction_items 
-                (transaction_id, variant_id, quantity, unit_price)
-                VALUES (%s, %s, %s, %s)""",
-                (transaction_id, item['variant_id'], item['quantity'], item['unit_price'])
-            )
-            
-            cursor.execute(
-                """UPDATE product_variants 
-                SET current_stock = current_stock - %s 
-                WHERE variant_id = %s""",
-                (item['quantity'], item['variant_id'])
-            )
-        
-        conn.commit()
+        pin_reads_to_primary()
         return jsonify({"transaction_id": transaction_id}), 201
         
     except Exception as e:
-        conn.rollback()
         return jsonify({"error": str(e)}), 400
     finally:
         if conn and conn.is_connected():
-            cursor.close()
             conn.close()
 
 # ========================
 # Report Endpoints
 # ========================
-@app.route('/api/reports/sales', methods=['GET'])
+@api.route('/api/reports/sales', methods=['GET'])
 @role_required('admin')
+@db_route('replica')
 def get_sales_report():
-    """Generate sales report (Admin only)"""
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
+    """Generate sales report (Admin only)
     
-    query = """
-    SELECT DATE(t.created_at) as date, 
-           COUNT(*) as transactions,
-           SUM(t.total_amount) as total_sales,
-           SUM(ti.quantity) as items_sold
-    FROM transactions t
-    JOIN transaction_items ti ON t.transaction_id = ti.transaction_id
+    Days before the archive boundary come from the sales_daily rollup,
+    later days from the hot transaction tables.
     """
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError:
+        return jsonify({"error": "Invalid date format"}), 400
+    if not (start and end):
+        start = end = None
     
+    boundary = execute_query(ARCHIVE_BOUNDARY_QUERY, (ARCHIVE_NAME,), fetch_one=True)
+    archived, hot = split_range(start, end, boundary and boundary['archived_before'])
+    
+    report = []
+    if hot:
+        report += execute_query(
+            DAILY_SALES_QUERY.format(items_table='transaction_items', transactions_table='transactions'),
+            hot, fetch_all=True, coalesce=True
+        )
+    if archived:
+        report += execute_query(ARCHIVED_SALES_QUERY, archived, fetch_all=True, coalesce=True)
+    
+    report.sort(key=lambda row: row['date'], reverse=True)
+    return jsonify(report)
+
+@api.route('/api/reports/product-performance', methods=['GET'])
+@role_required('admin')
+@db_route('replica')
+def get_product_performance_report():
+    """Top selling variants from the daily rollup (Admin only)"""
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError:
+        return jsonify({"error": "Invalid date format"}), 400
+    sort_by = request.args.get('sort', 'revenue')
+    limit = request.args.get('limit', 10, type=int)
+    
+    if sort_by not in PERFORMANCE_SORT_KEYS:
+        return jsonify({"error": "Invalid sort key"}), 400
+    if not limit or not 1 <= limit <= 100:
+        return jsonify({"error": "Limit must be between 1 and 100"}), 400
+    
+    query = PRODUCT_PERFORMANCE_QUERY
     params = []
-    if start_date and end_date:
-        query += " WHERE DATE(t.created_at) BETWEEN %s AND %s"
-        params.extend([start_date, end_date])
+    if start and end:
+        query += " WHERE sale_date BETWEEN %s AND %s"
+        params.extend([start, end])
+    query += " GROUP BY variant_id"
+    
+    ranked = rank_variants(execute_query(query, params, fetch_all=True, coalesce=True), sort_by, limit)
+    if not ranked:
+        return jsonify([])
     
-    query += " GROUP BY DATE(t.created_at) ORDER BY date DESC"
+    # Only the top N rows need product details
+    placeholders = ', '.join(['%s'] * len(ranked))
+    details = execute_query(
+        f"""SELECT v.variant_id, v.color, v.model_compatibility,
+                   {VARIANT_STOCK} AS current_stock,
+                   p.product_id, p.name AS product_name, p.category
+            FROM product_variants v
+            JOIN products p ON p.product_id = v.product_id
+            {VARIANT_STOCK_JOIN}
+            WHERE v.variant_id IN ({placeholders})""",
+        [row['variant_id'] for row in ranked],
+        fetch_all=True
+    )
+    details = {row['variant_id']: row for row in details}
+    
+    for row in ranked:
+        detail = details.get(row['variant_id'], {})
+        row.update(detail)
+        row['sell_through'] = sell_through(row['total_sold'], detail.get('current_stock'))
     
-    report = execute_query(query, params, fetch_all=True)
+    return jsonify(ranked)
+
+@api.route('/api/reports/inventory', methods=['GET'])
+@role_required('admin')
+@db_route('replica')
+def get_inventory_report():
+    """Stock valuation by category from running totals (Admin only)"""
+    report = execute_query(INVENTORY_REPORT_QUERY, fetch_all=True, coalesce=True)
     return jsonify(report)
 
+# ========================
+# Admin Endpoints
+# ========================
+@api.route('/api/admin/audit-logs', methods=['GET'])
+@role_required('admin')
+@db_route('replica')
+def get_audit_logs():
+    """Keyset-paginated audit log, newest first (Admin only)
+    
+    Defaults to the last 30 days so every query is bounded on created_at and
+    only touches the matching monthly partitions. The cursor for the next page
+    is returned in the X-Next-Cursor header.
+    """
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    limit = request.args.get('limit', 50, type=int)
+    after = request.args.get('cursor')
+    
+    if not limit or not 1 <= limit <= 200:
+        return jsonify({"error": "Limit must be between 1 and 200"}), 400
+    try:
+        end = (datetime.strptime(end_date, '%Y-%m-%d') if end_date
+               else datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)) + timedelta(days=1)
+        start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else end - timedelta(days=31)
+        after = decode_cursor(after) if after else None
+    except ValueError:
+        return jsonify({"error": "Invalid date or cursor"}), 400
+    
+    params = [start, end]
+    if after:
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit + 1)
+    
+    logs = execute_query(
+        AUDIT_PAGE_QUERY.format(after=AUDIT_AFTER_CLAUSE if after else ''),
+        params,
+        fetch_all=True
+    )
+    
+    response = make_response(jsonify(logs[:limit]))
+    if len(logs) > limit:
+        response.headers['X-Next-Cursor'] = encode_cursor(logs[limit - 1])
+    return response
+
+@api.route('/api/admin/users/<int:user_id>', methods=['PUT'])
+@role_required('admin')
+@db_route('primary')
+def update_user(user_id):
+    """Change a user's role, name or active flag (Admin only)
+    
+    Takes effect on the user's next request; existing tokens are not trusted
+    for role or status.
+    """
+    data = request.get_json() or {}
+    updates = {}
+    if 'role' in data:
+        if not isinstance(data['role'], str) or not validate_input(data['role'], r'^[a-z_]{2,20}$'):
+            return jsonify({"error": "Invalid role"}), 400
+        updates['role'] = data['role']
+    if 'is_active' in data:
+        if not isinstance(data['is_active'], bool):
+            return jsonify({"error": "is_active must be true or false"}), 400
+        updates['is_active'] = data['is_active']
+    if 'full_name' in data:
+        if not isinstance(data['full_name'], str) or not validate_input(data['full_name'], r'^.{1,100}$'):
+            return jsonify({"error": "Full name must be 1-100 characters"}), 400
+        updates['full_name'] = data['full_name']
+    if not updates:
+        return jsonify({"error": "No fields to update"}), 400
+    
+    if user_id == current_identity()['user_id'] and (
+            updates.get('role', 'admin') != 'admin' or updates.get('is_active', True) is False):
+        return jsonify({"error": "You cannot demote or deactivate your own account"}), 400
+    
+    if not execute_query("SELECT user_id FROM users WHERE user_id = %s", (user_id,), fetch_one=True):
+        return jsonify({"error": "User not found"}), 404
+    
+    execute_query(
+        f"UPDATE users SET {', '.join(f'{field} = %s' for field in updates)} WHERE user_id = %s",
+        (*updates.values(), user_id)
+    )
+    invalidate_identity(user_id)
+    
+    log_security_action(
+        current_identity()['user_id'],
+        f"user_update:{user_id}:{','.join(f'{k}={v}' for k, v in updates.items() if k != 'full_name')}",
+        request
+    )
+    return jsonify({"message": "User updated"})
+
 # ========================
 # Error Handlers
 # ========================
-@app.errorhandler(429)
+@api.app_errorhandler(429)
 def ratelimit_handler(e):
     return jsonify({"error": "Too many requests"}), 429
 
-@app.errorhandler(400)
+@api.app_errorhandler(400)
 def bad_request_handler(e):
     return jsonify({"error": "Bad request"}), 400
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found_handler(e):
     return jsonify({"error": "Resource not found"}), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def server_error_handler(e):
-    app.logger.error(f"Server error: {str(e)}")
+    current_app.logger.error(f"Server error: {str(e)}")
     return jsonify({"error": "Internal server error"}), 500
 
 # ========================
 # Startup
 # ========================
 if __name__ == '__main__':
-    # Configure logging
-    handler = RotatingFileHandler('app.log', maxBytes=10000, backupCount=3)
-    handler.setLevel(logging.INFO)
-    app.logger.addHandler(handler)
-    
-    app.run( debug=True)
\ No newline at end of file
+    # The Werkzeug debugger runs arbitrary code; only enable it locally
+    create_app().run(debug=os.getenv('FLASK_DEBUG', 'false').lower() in ('1', 'true'))
\ No newline at end of file
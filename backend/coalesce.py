@@ -0,0 +1,198 @@
+"""
+Single-flight coalescing of identical expensive reads.
+
+Concurrent callers with the same key share one execution: within a process
+through an in-memory call table, across worker processes on the same host
+through a per-key lock file and a result file. A result stays reusable for
+`window` seconds after it was produced (0 = only for callers that were
+already waiting).
+
+Result files are JSON (rows with Decimal, date, datetime and timedelta
+values are tagged so they round-trip), never pickle, and live in a directory
+that must be private to the app's OS user; otherwise sharing is disabled.
+"""
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from runtime_dirs import default_path, private_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalesce within the process only
+    fcntl = None
+
+_MISS = object()
+
+
+def _encode(value):
+    """json.dump default= hook for the types MySQL rows contain"""
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, timedelta):
+        return {'__timedelta__': [value.days, value.seconds, value.microseconds]}
+    if isinstance(value, (bytes, bytearray)):
+        return {'__bytes__': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Cannot share a {type(value).__name__} result")
+
+
+def _decode(obj):
+    """json.load object_hook reversing _encode"""
+    if len(obj) != 1:
+        return obj
+    (tag, value), = obj.items()
+    if tag == '__decimal__':
+        return Decimal(value)
+    if tag == '__datetime__':
+        return datetime.fromisoformat(value)
+    if tag == '__date__':
+        return date.fromisoformat(value)
+    if tag == '__timedelta__':
+        return timedelta(days=value[0], seconds=value[1], microseconds=value[2])
+    if tag == '__bytes__':
+        return base64.b64decode(value)
+    return obj
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    def __init__(self, window=1.0, shared_dir=None, max_file_age=300):
+        self.window = window
+        # Results are read back from these files, so only a directory nobody
+        # else can write to is used; anything else means per-process only
+        self.shared_dir = private_dir(shared_dir) if fcntl and shared_dir else None
+        self.max_file_age = max_file_age
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    @classmethod
+    def from_env(cls):
+        shared = os.getenv('DB_COALESCE_ACROSS_WORKERS', 'true').lower() == 'true'
+        directory = os.getenv('DB_COALESCE_DIR') or default_path(
+            f"singleflight-{os.getenv('DB_NAME', 'default')}"
+        )
+        return cls(
+            window=float(os.getenv('DB_COALESCE_WINDOW', 1.0)),
+            shared_dir=directory if shared else None
+        )
+
+    def do(self, key, fn):
+        """Return fn()'s result, sharing it with concurrent callers of the same key"""
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            call = self._calls.get(key)
+            leader = call is None or (
+                call.finished_at is not None
+                and (call.error is not None or now - call.finished_at > self.window)
+            )
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._shared(key, fn) if self.shared_dir else fn()
+            return call.result
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            call.event.set()
+
+    def _sweep(self, now):
+        """Drop finished calls past the window (caller holds self._lock)"""
+        if now - self._last_sweep < max(self.window, 1.0):
+            return
+        self._last_sweep = now
+        for key in [k for k, c in self._calls.items()
+                    if c.finished_at is not None and now - c.finished_at > self.window]:
+            del self._calls[key]
+
+    # ========================
+    # Cross-process
+    # ========================
+    def _shared(self, key, fn):
+        path = os.path.join(self.shared_dir, hashlib.sha256(key.encode('utf-8')).hexdigest())
+        # Anything written after this point was produced for us, too
+        not_before = time.time() - self.window
+
+        result = self._read(path, not_before)
+        if result is not _MISS:
+            return result
+
+        with open(path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another worker may have run it while we waited for the lock
+                result = self._read(path, not_before)
+                if result is not _MISS:
+                    return result
+                result = fn()
+                self._write(path, result)
+                if random.random() < 0.01:
+                    self.prune_files()
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self, path, not_before):
+        try:
+            if os.stat(path).st_mtime < not_before:
+                return _MISS
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f, object_hook=_decode)
+        except (OSError, ValueError):
+            return _MISS
+
+    def _write(self, path, result):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, default=_encode)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            # Sharing is best effort; the caller still gets its result
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def prune_files(self):
+        """Delete result and lock files untouched for max_file_age seconds"""
+        if not self.shared_dir:
+            return 0
+        cutoff = time.time() - self.max_file_age
+        removed = 0
+        for name in os.listdir(self.shared_dir):
+            path = os.path.join(self.shared_dir, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Recompute suggested reorder points from recent daily demand. Run nightly
+from cron; with --apply the suggestions also replace low_stock_threshold
+for variants that sold in the window.
+"""
+import argparse
+import mysql.connector
+import os
+import sys
+import time
+from datetime import date
+from dotenv import load_dotenv
+
+import db
+from reorder import refresh_reorder_points
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--window-days', type=int,
+                        default=int(os.getenv('REORDER_WINDOW_DAYS', 90)))
+    parser.add_argument('--lead-time-days', type=float,
+                        default=float(os.getenv('REORDER_LEAD_TIME_DAYS', 7)))
+    parser.add_argument('--service-level', type=float,
+                        default=float(os.getenv('REORDER_SERVICE_LEVEL', 0.95)))
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--apply', action='store_true',
+                        help='also update product_variants.low_stock_threshold')
+    args = parser.parse_args()
+
+    conn = None
+    try:
+        # Connect to the primary (DB_HOST/DB_PORT)
+        conn = db.connect()
+
+        started = time.perf_counter()
+        # Today is still being sold, so the window ends with yesterday
+        result = refresh_reorder_points(
+            conn, date.today(),
+            window_days=args.window_days,
+            lead_time=args.lead_time_days,
+            service_level=args.service_level,
+            batch_size=args.batch_size,
+            apply=args.apply
+        )
+        print(f"[OK] Reorder points for {result['variants']} variants from sales "
+              f"{result['start']} to {result['end']} in {time.perf_counter() - started:.1f}s")
+        if args.apply:
+            print(f"[OK] {result['thresholds_updated']} low stock thresholds updated")
+        return 0
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+        return 2
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+-- Cold storage for closed sales periods (see archive_transactions.py)
+USE mobile_pos_system;
+
+-- LIKE copies columns and indexes but not foreign keys
+CREATE TABLE IF NOT EXISTS transactions_archive LIKE transactions;
+ALTER TABLE transactions_archive ROW_FORMAT=COMPRESSED;
+
+CREATE TABLE IF NOT EXISTS transaction_items_archive LIKE transaction_items;
+ALTER TABLE transaction_items_archive ROW_FORMAT=COMPRESSED;
+
+-- Daily sales totals for archived days, answered instead of scanning the archive
+CREATE TABLE IF NOT EXISTS sales_daily (
+    sale_date DATE NOT NULL PRIMARY KEY,
+    transactions INT NOT NULL DEFAULT 0,
+    total_sales DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    items_sold INT NOT NULL DEFAULT 0
+);
+
+-- Everything created before archived_before lives in the archive tables
+CREATE TABLE IF NOT EXISTS archive_state (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    archived_before DATE NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Helps the hot sales report and the archiver's range scans
+-- (only if missing, so this file can be re-run)
+SET @add_index = IF(
+    EXISTS (SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'transactions'
+              AND index_name = 'idx_created_at'),
+    'DO 0',
+    'ALTER TABLE transactions ADD INDEX idx_created_at (created_at)'
+);
+PREPARE add_index FROM @add_index;
+EXECUTE add_index;
+DEALLOCATE PREPARE add_index;
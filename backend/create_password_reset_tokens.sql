@@ -0,0 +1,17 @@
+-- Password reset tokens stored as SHA-256 hashes (see password_reset.py).
+-- Replaces the plaintext table; outstanding tokens (valid for an hour at
+-- most) are discarded, so pending reset links must be requested again.
+USE mobile_pos_system;
+
+DROP TABLE IF EXISTS password_reset_tokens;
+
+CREATE TABLE password_reset_tokens (
+    token_id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    token_hash CHAR(64) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE INDEX idx_token_hash (token_hash),
+    INDEX idx_user_id (user_id),
+    INDEX idx_expires_at (expires_at)
+);
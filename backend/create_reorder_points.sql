@@ -0,0 +1,13 @@
+-- Suggested reorder points per variant, refreshed by compute_reorder_points.py
+USE mobile_pos_system;
+
+CREATE TABLE IF NOT EXISTS variant_reorder_points (
+    variant_id INT NOT NULL PRIMARY KEY,
+    demand_per_day DECIMAL(12, 4) NOT NULL DEFAULT 0,
+    demand_std DECIMAL(12, 4) NOT NULL DEFAULT 0,
+    days_observed SMALLINT NOT NULL DEFAULT 0,
+    lead_time_days DECIMAL(6, 2) NOT NULL,
+    safety_stock INT NOT NULL DEFAULT 0,
+    reorder_point INT NOT NULL DEFAULT 0,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -0,0 +1,51 @@
+-- Daily per-variant sales rollup used by the product performance report.
+-- Run create_stock_escrow.sql afterwards (required: it adds the slot columns).
+USE mobile_pos_system;
+
+CREATE TABLE IF NOT EXISTS product_sales_daily (
+    sale_date DATE NOT NULL,
+    variant_id INT NOT NULL,
+    quantity INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    cost DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, variant_id),
+    INDEX idx_variant_id (variant_id)
+);
+
+-- One-off backfill from existing sales, skipped once the table has rows.
+-- Never rebuild it from transaction_items: months moved out by
+-- archive_transactions.py only exist here and in the archive tables.
+INSERT INTO product_sales_daily (sale_date, variant_id, quantity, revenue, cost)
+SELECT DATE(t.created_at), ti.variant_id,
+       SUM(ti.quantity),
+       SUM(ti.quantity * ti.unit_price),
+       SUM(ti.quantity * p.cost_price)
+FROM transaction_items ti
+JOIN transactions t ON t.transaction_id = ti.transaction_id
+JOIN product_variants v ON v.variant_id = ti.variant_id
+JOIN products p ON p.product_id = v.product_id
+WHERE NOT EXISTS (SELECT 1 FROM product_sales_daily)
+GROUP BY DATE(t.created_at), ti.variant_id;
+
+-- Per-category running totals used by the inventory valuation report
+CREATE TABLE IF NOT EXISTS inventory_valuation (
+    category VARCHAR(100) NOT NULL PRIMARY KEY,
+    units BIGINT NOT NULL DEFAULT 0,
+    cost_value DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    retail_value DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- One-off seed from current stock, skipped once the table has rows (this
+-- runs before create_stock_escrow.sql, so there is no escrowed stock yet).
+-- Later drift, escrow included, is repaired without blocking sales by
+-- reconcile_inventory_valuation.py; never re-seed a live table from here.
+INSERT INTO inventory_valuation (category, units, cost_value, retail_value)
+SELECT p.category,
+       SUM(v.current_stock),
+       SUM(v.current_stock * p.cost_price),
+       SUM(v.current_stock * p.base_price)
+FROM product_variants v
+JOIN products p ON p.product_id = v.product_id
+WHERE NOT EXISTS (SELECT 1 FROM inventory_valuation)
+GROUP BY p.category;
@@ -0,0 +1,44 @@
+-- Contention handling for the sale path (see sales.py).
+-- Required, not optional: run after create_report_rollups.sql and before
+-- starting the app. Every sale writes the slot columns, and the inventory
+-- endpoints and reports read variant_stock_escrow. Safe to re-run.
+USE mobile_pos_system;
+
+-- Stripe the rollups written by every sale; readers SUM over slot.
+-- Each ALTER is one atomic statement, so checking for the column is enough.
+SET @stripe_rollup = IF(
+    EXISTS (SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'product_sales_daily'
+              AND column_name = 'slot'),
+    'DO 0',
+    'ALTER TABLE product_sales_daily
+        ADD COLUMN slot TINYINT UNSIGNED NOT NULL DEFAULT 0 AFTER variant_id,
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (sale_date, variant_id, slot)'
+);
+PREPARE stripe_rollup FROM @stripe_rollup;
+EXECUTE stripe_rollup;
+DEALLOCATE PREPARE stripe_rollup;
+
+SET @stripe_valuation = IF(
+    EXISTS (SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = 'inventory_valuation'
+              AND column_name = 'slot'),
+    'DO 0',
+    'ALTER TABLE inventory_valuation
+        ADD COLUMN slot TINYINT UNSIGNED NOT NULL DEFAULT 0 AFTER category,
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (category, slot)'
+);
+PREPARE stripe_valuation FROM @stripe_valuation;
+EXECUTE stripe_valuation;
+DEALLOCATE PREPARE stripe_valuation;
+
+-- Escrowed stock for ultra-hot variants (ESCROW_VARIANTS), refilled from
+-- product_variants.current_stock by refill_stock_escrow.py
+CREATE TABLE IF NOT EXISTS variant_stock_escrow (
+    variant_id INT NOT NULL,
+    slot TINYINT UNSIGNED NOT NULL,
+    quantity INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (variant_id, slot)
+);
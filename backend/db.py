@@ -0,0 +1,324 @@
+"""
+Database access shared by the web app and the maintenance CLI (no Flask imports).
+
+Connections go to the primary, or for reads to a lag-checked replica when the
+web app's routing hook allows it. Outside the app every query uses the primary.
+"""
+import logging
+import os
+import random
+import threading
+import time
+import mysql.connector
+
+from coalesce import SingleFlight
+from runtime_dirs import default_path, private_dir, write_marker
+
+logger = logging.getLogger('clessaapp.db')
+
+# Request-aware behaviour, installed by the web app (clessaapp.create_app)
+_hooks = {
+    'use_replica': lambda: False,        # may this read go to a replica?
+    'may_coalesce': lambda: True,        # may this read share another caller's result?
+    'after_write': lambda: None,         # a write committed (read-your-writes)
+    'record_timing': lambda seconds: None,
+}
+
+_replicas = None
+_pins = None
+_single_flight = None
+_lazy_lock = threading.Lock()
+
+# Statements that can safely run on a replica
+_READ_PREFIXES = ('SELECT', 'WITH', 'SHOW')
+_LOCKING_READS = ('FOR UPDATE', 'FOR SHARE', 'LOCK IN SHARE MODE')
+
+
+def parse_hosts(value):
+    """'db1:3307,db2' -> [('db1', 3307), ('db2', 3306)]"""
+    hosts = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        hosts.append((host, int(port or 3306)))
+    return hosts
+
+
+def connect(host=None, port=None, timeout=None, connect_timeout=None):
+    """Open a connection; defaults to the primary from DB_HOST/DB_PORT.
+
+    `timeout` (seconds) bounds connecting and every socket read/write, so an
+    unreachable host fails fast instead of after the OS TCP timeout.
+    `connect_timeout` bounds connecting only, leaving queries unlimited; it
+    uses the pure-Python driver, which drops the timeout once connected (the
+    C extension keeps it for every read).
+    """
+    options = {}
+    if timeout:
+        options['connection_timeout'] = timeout
+    elif connect_timeout:
+        options['connection_timeout'] = connect_timeout
+        options['use_pure'] = True
+    return mysql.connector.connect(
+        host=host or os.getenv('DB_HOST'),
+        port=port or int(os.getenv('DB_PORT', 3306)),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME'),
+        **options
+    )
+
+
+def is_read_only(query):
+    sql = query.lstrip().upper()
+    return sql.startswith(_READ_PREFIXES) and not any(lock in sql for lock in _LOCKING_READS)
+
+
+class ReplicaSet:
+    """Read replicas, each used only while its replication lag is within bounds.
+
+    Lag comes from SHOW REPLICA STATUS and is re-checked at most every
+    `check_interval` seconds per replica. A replica that cannot be reached,
+    has stopped replicating, or lags more than `max_lag` seconds is skipped
+    until its next check, so reads fall back to the primary. Lag checks and
+    connecting give up after `connect_timeout` seconds; queries are not
+    limited, since replicas exist to take the slow report reads.
+    """
+
+    def __init__(self, hosts, max_lag=2, check_interval=5, connect_timeout=2):
+        self.hosts = list(hosts)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.connect_timeout = connect_timeout
+        self._health = {}  # (host, port) -> (healthy, checked_at)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            parse_hosts(os.getenv('DB_REPLICAS')),
+            max_lag=float(os.getenv('DB_REPLICA_MAX_LAG', 2)),
+            check_interval=float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5)),
+            connect_timeout=int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', 2))
+        )
+
+    def __bool__(self):
+        return bool(self.hosts)
+
+    def connect(self):
+        """Connection to a healthy replica, or None if there is none"""
+        candidates = [replica for replica in self.hosts if self._is_healthy(replica)]
+        random.shuffle(candidates)
+        for host, port in candidates:
+            try:
+                return connect(host, port, connect_timeout=self.connect_timeout)
+            except mysql.connector.Error:
+                self.mark_down((host, port))
+        return None
+
+    def mark_down(self, replica):
+        with self._lock:
+            self._health[replica] = (False, time.monotonic())
+
+    def _is_healthy(self, replica):
+        now = time.monotonic()
+        with self._lock:
+            healthy, checked_at = self._health.get(replica, (False, None))
+            if checked_at is not None and now - checked_at < self.check_interval:
+                return healthy
+            # Claim the check so concurrent threads keep using the old answer
+            self._health[replica] = (healthy, now)
+
+        healthy = self._check_lag(replica)
+        with self._lock:
+            self._health[replica] = (healthy, time.monotonic())
+        return healthy
+
+    def _check_lag(self, replica):
+        conn = None
+        try:
+            conn = connect(*replica, timeout=self.connect_timeout)
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except mysql.connector.Error:
+                # MySQL < 8.0.22
+                cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+            cursor.close()
+            if not status:
+                return False
+            lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+            return lag is not None and lag <= self.max_lag
+        except mysql.connector.Error:
+            return False
+        finally:
+            if conn and conn.is_connected():
+                conn.close()
+
+
+class PrimaryPins:
+    """Read-your-writes pins: key -> wall-clock time until which its reads use the primary.
+
+    A pin is a marker file whose mtime is the pin-until time, so a pin set by
+    one worker is seen by every worker on the host (one stat per routed read).
+    Without a usable shared directory pins only hold within this process.
+    """
+
+    def __init__(self, seconds=5, shared_dir=None):
+        self.seconds = seconds
+        self.shared_dir = private_dir(shared_dir) if shared_dir else None
+        self._local = {}  # key -> pin-until (time.time_ns())
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        shared = os.getenv('DB_PIN_ACROSS_WORKERS', 'true').lower() == 'true'
+        directory = os.getenv('DB_PIN_DIR') or default_path(f"pins-{os.getenv('DB_NAME', 'default')}")
+        return cls(
+            seconds=float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', 5)),
+            shared_dir=directory if shared else None
+        )
+
+    def pin(self, key):
+        now = time.time_ns()
+        until = now + int(self.seconds * 1e9)
+        with self._lock:
+            for expired in [k for k, t in self._local.items() if t <= now]:
+                del self._local[expired]
+            self._local[key] = until
+        if self.shared_dir:
+            try:
+                write_marker(os.path.join(self.shared_dir, str(key)), until)
+            except OSError as err:
+                logger.warning(f"Read-your-writes pin not shared with other workers: {err}")
+
+    def is_pinned(self, key):
+        now = time.time_ns()
+        with self._lock:
+            if self._local.get(key, 0) > now:
+                return True
+        if not self.shared_dir:
+            return False
+        try:
+            return os.stat(os.path.join(self.shared_dir, str(key))).st_mtime_ns > now
+        except FileNotFoundError:
+            return False
+        except OSError as err:
+            # Unknown state: the primary is always correct
+            logger.warning(f"Cannot check read-your-writes pin: {err}")
+            return True
+
+
+# ========================
+# Query execution
+# ========================
+def set_hooks(**hooks):
+    unknown = set(hooks) - set(_hooks)
+    if unknown:
+        raise TypeError(f"Unknown db hooks: {', '.join(sorted(unknown))}")
+    _hooks.update(hooks)
+
+
+def get_replicas():
+    """ReplicaSet from the environment, built on first use"""
+    global _replicas
+    if _replicas is None:
+        with _lazy_lock:
+            if _replicas is None:
+                _replicas = ReplicaSet.from_env()
+    return _replicas
+
+
+def get_pins():
+    """PrimaryPins from the environment, built on first use"""
+    global _pins
+    if _pins is None:
+        with _lazy_lock:
+            if _pins is None:
+                _pins = PrimaryPins.from_env()
+    return _pins
+
+
+def get_single_flight():
+    global _single_flight
+    if _single_flight is None:
+        with _lazy_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight.from_env()
+    return _single_flight
+
+
+def execute_query(query, params=None, fetch_one=False, fetch_all=False, lastrowid=False,
+                  coalesce=False, primary=False):
+    """Safe query execution with parameterized queries
+
+    Read-only statements go to a healthy replica when one is configured
+    (DB_REPLICAS) and routing allows it; everything else, and any query with
+    primary=True, uses the primary.
+    With coalesce=True, identical concurrent reads (same SQL, params and
+    target) share one execution and its result, reused for DB_COALESCE_WINDOW
+    seconds. Only use it for queries whose result may be that stale, and
+    treat the returned rows as read-only. Callers that must see their own
+    recent writes (see the may_coalesce hook) always run the query.
+    """
+    read_only = not lastrowid and is_read_only(query)
+    use_replica = read_only and not primary and _hooks['use_replica']()
+    if coalesce and read_only and _hooks['may_coalesce']():
+        key = repr((use_replica, query, tuple(params or ()), fetch_one, fetch_all))
+        return get_single_flight().do(
+            key, lambda: _run_query(query, params, fetch_one, fetch_all, lastrowid, read_only, use_replica)
+        )
+    return _run_query(query, params, fetch_one, fetch_all, lastrowid, read_only, use_replica)
+
+
+def _run_query(query, params, fetch_one, fetch_all, lastrowid, read_only, use_replica):
+    started = time.perf_counter()
+    try:
+        if use_replica:
+            replicas = get_replicas()
+            conn = replicas.connect()
+            if conn is not None:
+                replica = (conn.server_host, conn.server_port)
+                try:
+                    return _execute(lambda: conn, query, params, fetch_one, fetch_all, lastrowid, read_only)
+                except (mysql.connector.OperationalError, mysql.connector.InterfaceError) as err:
+                    # Lost or broken replica connection: skip it until its next check
+                    replicas.mark_down(replica)
+                    logger.warning(f"Replica {replica[0]}:{replica[1]} failed, retrying on the primary: {err}")
+        return _execute(connect, query, params, fetch_one, fetch_all, lastrowid, read_only)
+    finally:
+        _hooks['record_timing'](time.perf_counter() - started)
+
+
+def _execute(open_connection, query, params, fetch_one, fetch_all, lastrowid, read_only):
+    conn = None
+    try:
+        conn = open_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, params or ())
+
+        if fetch_one:
+            result = cursor.fetchone()
+        elif fetch_all:
+            result = cursor.fetchall()
+        elif lastrowid:
+            result = cursor.lastrowid
+        else:
+            result = None
+
+        conn.commit()
+        if not read_only:
+            _hooks['after_write']()
+        return result
+    except Exception as e:
+        if conn and conn.is_connected():
+            conn.rollback()
+        logger.error(f"Database error: {str(e)}")
+        raise
+    finally:
+        if conn and conn.is_connected():
+            cursor.close()
+            conn.close()
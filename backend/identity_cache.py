@@ -0,0 +1,125 @@
+"""
+In-process cache of user identities (role, active flag) for auth checks.
+
+Every authenticated request needs the user's current role and whether the
+account is still active; the cache answers from memory for `ttl` seconds.
+Code that changes a user calls invalidate() after committing. With a shared
+directory, invalidate() also stamps a per-user marker file that every worker
+process on the host checks (one stat) on each hit, so a role change or
+deactivation applies on the next request in all workers, not after the TTL.
+
+The directory is shared with the app's group (mode 2770), so manage.py can
+invalidate when run as another user in that group. Markers are replaced, never
+modified, so no process needs to own a marker written by another.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from runtime_dirs import default_path, group_dir, write_marker
+
+logger = logging.getLogger('clessaapp.identity_cache')
+
+
+class IdentityCache:
+    def __init__(self, ttl=60, max_entries=10000, shared_dir=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared_dir = group_dir(shared_dir) if shared_dir else None
+        self._stat_failed = False
+        self._entries = OrderedDict()  # user_id -> (identity, expires_at, loaded_at_ns)
+        self._invalidated = {}         # user_id -> time.time_ns() of the last local invalidate
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        shared = os.getenv('AUTH_CACHE_ACROSS_WORKERS', 'true').lower() == 'true'
+        directory = os.getenv('AUTH_CACHE_DIR') or default_path(f"identity-{os.getenv('DB_NAME', 'default')}")
+        return cls(
+            ttl=float(os.getenv('AUTH_CACHE_TTL', 60)),
+            max_entries=int(os.getenv('AUTH_CACHE_MAX_ENTRIES', 10000)),
+            shared_dir=directory if shared else None
+        )
+
+    def get(self, user_id, loader):
+        """Cached identity for user_id, calling loader(user_id) on a miss.
+
+        The loader returns a dict, or None for an unknown user (cached too).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now < entry[1]:
+                self._entries.move_to_end(user_id)
+            else:
+                entry = None
+        if entry is not None and not self._stale(user_id, entry[2]):
+            return entry[0]
+
+        # Stamp before loading: an invalidate that races with the query is
+        # newer than the stamp, so the result is dropped on the next get()
+        loaded_at = time.time_ns()
+        identity = loader(user_id)
+        self.put(user_id, identity, loaded_at)
+        return identity
+
+    def put(self, user_id, identity, loaded_at=None):
+        loaded_at = loaded_at or time.time_ns()
+        with self._lock:
+            if self._invalidated.get(user_id, 0) >= loaded_at:
+                return
+            self._entries[user_id] = (identity, time.monotonic() + self.ttl, loaded_at)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """Forget user_id here and, via the marker file, in other workers.
+
+        Best effort: returns False (and logs) if the marker could not be
+        written, in which case other workers keep the entry until the TTL.
+        """
+        stamp = time.time_ns()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._invalidated[user_id] = stamp
+            self._prune_invalidated(stamp)
+        if not self.shared_dir:
+            return True
+        try:
+            write_marker(self._marker(user_id), stamp)
+            return True
+        except OSError as err:
+            logger.warning(f"Cannot invalidate user {user_id} in other workers: {err}")
+            return False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _stale(self, user_id, loaded_at):
+        if self._invalidated.get(user_id, 0) >= loaded_at:
+            return True
+        if not self.shared_dir:
+            return False
+        try:
+            return os.stat(self._marker(user_id)).st_mtime_ns >= loaded_at
+        except FileNotFoundError:
+            return False
+        except OSError as err:
+            # Can't tell, so reload from the database rather than trust the entry
+            if not self._stat_failed:
+                self._stat_failed = True
+                logger.warning(f"Cannot check identity markers in {self.shared_dir}: {err}")
+            return True
+
+    def _marker(self, user_id):
+        return os.path.join(self.shared_dir, str(user_id))
+
+    def _prune_invalidated(self, now_ns):
+        """Drop invalidation stamps older than any live entry (caller holds self._lock)"""
+        cutoff = now_ns - int(self.ttl * 1e9)
+        for user_id in [u for u, stamp in self._invalidated.items() if stamp < cutoff]:
+            del self._invalidated[user_id]
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Maintenance CLI for user accounts. Uses the shared DB layer and bcrypt
+directly, so it starts without importing Flask.
+
+    python manage.py users
+    python manage.py create-admin [--email EMAIL] [--password PASSWORD] [--name NAME]
+    python manage.py reset-password EMAIL [--password PASSWORD]
+    python manage.py verify-password EMAIL [--password PASSWORD] [--reset-if-wrong]
+    python manage.py update-user EMAIL [--role ROLE] [--active | --inactive]
+
+Passwords are prompted for when not given on the command line.
+"""
+import argparse
+import getpass
+import sys
+import bcrypt
+import mysql.connector
+from dotenv import load_dotenv
+
+from db import execute_query
+from identity_cache import IdentityCache
+
+# Load environment variables
+load_dotenv()
+
+# Flask-Bcrypt's default cost, so hashes work with the app's check_password_hash
+BCRYPT_ROUNDS = 12
+
+def hash_password(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS)).decode('utf-8')
+
+def check_password(password_hash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def get_password(args, prompt="Password: "):
+    return args.password or getpass.getpass(prompt)
+
+def get_user(email):
+    return execute_query(
+        "SELECT user_id, email, password_hash, role, full_name, is_active FROM users WHERE email = %s",
+        (email,),
+        fetch_one=True
+    )
+
+# ========================
+# Commands
+# ========================
+def list_users(args):
+    """Show existing users"""
+    if not execute_query("SHOW TABLES LIKE 'users'", fetch_one=True):
+        print("[ERROR] 'users' table does not exist in the database!")
+        return 1
+
+    users = execute_query("SELECT email, role, full_name, is_active FROM users", fetch_all=True)
+    print(f"[INFO] Found {len(users)} users in database:")
+    for user in users:
+        status = "ACTIVE" if user['is_active'] else "INACTIVE"
+        print(f"  - {user['email']} ({user['role']}) - {status}")
+    if not users:
+        print("  [WARNING] No users found! Run: python manage.py create-admin")
+    return 0
+
+def create_admin(args):
+    """Create an admin user if the email is not taken"""
+    existing = get_user(args.email)
+    if existing:
+        print(f"[OK] User already exists: {existing['email']} ({existing['role']})")
+        return 0
+
+    password = get_password(args)
+    execute_query(
+        """INSERT INTO users (email, password_hash, role, full_name, is_active, created_at)
+        VALUES (%s, %s, %s, %s, %s, NOW())""",
+        (args.email, hash_password(password), 'admin', args.name, True)
+    )
+    print("[OK] Admin user created!")
+    print(f"     Email: {args.email}")
+    print("     Role: admin")
+    return 0
+
+def reset_password(args):
+    """Set a new password for an existing user"""
+    user = get_user(args.email)
+    if not user:
+        print(f"[ERROR] User {args.email} not found!")
+        return 1
+
+    password = get_password(args, "New password: ")
+    execute_query(
+        "UPDATE users SET password_hash = %s WHERE user_id = %s",
+        (hash_password(password), user['user_id'])
+    )
+    print(f"[OK] Password reset for {user['email']} ({user['role']})")
+    return 0
+
+def verify_password(args):
+    """Check a password against the stored hash, optionally resetting it"""
+    user = get_user(args.email)
+    if not user:
+        print(f"[ERROR] User with email '{args.email}' not found!")
+        return 1
+
+    print(f"[INFO] Found user: {user['email']} ({user['role']})")
+    print(f"[INFO] Account status: {'ACTIVE' if user['is_active'] else 'INACTIVE'}")
+
+    password = get_password(args)
+    if check_password(user['password_hash'], password):
+        print("[OK] Password is CORRECT!")
+        return 0 if user['is_active'] else 1
+
+    if not args.reset_if_wrong:
+        print("[ERROR] Password is INCORRECT!")
+        return 1
+
+    print("[WARNING] Password is INCORRECT - resetting now...")
+    execute_query(
+        "UPDATE users SET password_hash = %s WHERE user_id = %s",
+        (hash_password(password), user['user_id'])
+    )
+    print(f"[OK] Password reset for {user['email']}")
+    return 0
+
+def update_user(args):
+    """Change a user's role or active flag"""
+    user = get_user(args.email)
+    if not user:
+        print(f"[ERROR] User {args.email} not found!")
+        return 1
+
+    updates = {}
+    if args.role:
+        updates['role'] = args.role
+    if args.active is not None:
+        updates['is_active'] = args.active
+    if not updates:
+        print("[ERROR] Nothing to update (use --role, --active or --inactive)")
+        return 1
+
+    execute_query(
+        f"UPDATE users SET {', '.join(f'{field} = %s' for field in updates)} WHERE user_id = %s",
+        (*updates.values(), user['user_id'])
+    )
+    # Running app workers on this host drop their cached role/status
+    invalidated = IdentityCache.from_env().invalidate(user['user_id'])
+    print(f"[OK] Updated {user['email']}: " + ', '.join(f"{k}={v}" for k, v in updates.items()))
+    if not invalidated:
+        print(f"[WARNING] Running workers may use the old role/status for up to AUTH_CACHE_TTL seconds "
+              "(run as a member of the group owning AUTH_CACHE_DIR)")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('users', help=list_users.__doc__).set_defaults(func=list_users)
+
+    create = commands.add_parser('create-admin', help=create_admin.__doc__)
+    create.add_argument('--email', default='admin@clessa.com')
+    create.add_argument('--password')
+    create.add_argument('--name', default='System Administrator')
+    create.set_defaults(func=create_admin)
+
+    reset = commands.add_parser('reset-password', help=reset_password.__doc__)
+    reset.add_argument('email')
+    reset.add_argument('--password')
+    reset.set_defaults(func=reset_password)
+
+    verify = commands.add_parser('verify-password', help=verify_password.__doc__)
+    verify.add_argument('email')
+    verify.add_argument('--password')
+    verify.add_argument('--reset-if-wrong', action='store_true')
+    verify.set_defaults(func=verify_password)
+
+    update = commands.add_parser('update-user', help=update_user.__doc__)
+    update.add_argument('email')
+    update.add_argument('--role')
+    status = update.add_mutually_exclusive_group()
+    status.add_argument('--active', dest='active', action='store_true', default=None)
+    status.add_argument('--inactive', dest='active', action='store_false')
+    update.set_defaults(func=update_user)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
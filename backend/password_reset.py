@@ -0,0 +1,126 @@
+"""
+Password reset tokens: stored hashed, capped per user, swept when expired.
+
+Only the SHA-256 of a token is kept, so a leaked table or backup cannot be
+used to reset passwords. Tokens are 256-bit random values, which makes a
+fast hash sufficient; the unique index on token_hash is the lookup path.
+"""
+import hashlib
+import os
+import secrets
+import time
+from datetime import datetime, timedelta
+
+# Defaults; PASSWORD_RESET_TOKEN_TTL_MINUTES and PASSWORD_RESET_TOKENS_PER_USER
+# are read when a token is issued, after the app has loaded .env
+PASSWORD_RESET_TOKEN_TTL_MINUTES = 60
+# Outstanding tokens kept per user; a new request replaces the oldest
+PASSWORD_RESET_TOKENS_PER_USER = 3
+
+FIND_TOKEN_QUERY = """
+SELECT token_id, user_id FROM password_reset_tokens
+WHERE token_hash = %s AND expires_at > UTC_TIMESTAMP()
+FOR UPDATE
+"""
+
+SWEEP_EXPIRED_QUERY = """
+DELETE FROM password_reset_tokens
+WHERE expires_at <= UTC_TIMESTAMP()
+ORDER BY expires_at
+LIMIT %s
+"""
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def issue_token(conn, user_id, ttl=None, per_user=None):
+    """Create a reset token for user_id and return it (only its hash is stored).
+
+    Runs in one transaction with the user's row locked, so concurrent
+    requests cannot push the user past `per_user` outstanding tokens. Expired
+    tokens of the user and the oldest ones over the cap are deleted.
+    """
+    ttl = ttl or timedelta(minutes=int(os.getenv(
+        'PASSWORD_RESET_TOKEN_TTL_MINUTES', PASSWORD_RESET_TOKEN_TTL_MINUTES
+    )))
+    per_user = max(per_user or int(os.getenv('PASSWORD_RESET_TOKENS_PER_USER', PASSWORD_RESET_TOKENS_PER_USER)), 1)
+    token = secrets.token_urlsafe(32)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT user_id FROM users WHERE user_id = %s FOR UPDATE", (user_id,))
+        cursor.fetchall()
+        cursor.execute(
+            "SELECT token_id, expires_at FROM password_reset_tokens WHERE user_id = %s ORDER BY token_id DESC",
+            (user_id,)
+        )
+        now = datetime.utcnow()
+        live = []
+        stale = []
+        for token_id, expires_at in cursor.fetchall():
+            (live if expires_at > now and len(live) < per_user - 1 else stale).append(token_id)
+        if stale:
+            cursor.execute(
+                f"DELETE FROM password_reset_tokens WHERE token_id IN ({', '.join(['%s'] * len(stale))})",
+                stale
+            )
+        cursor.execute(
+            "INSERT INTO password_reset_tokens (user_id, token_hash, expires_at) VALUES (%s, %s, %s)",
+            (user_id, hash_token(token), now + ttl)
+        )
+        conn.commit()
+        return token
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def consume_token(conn, token, password_hash):
+    """Set the password of the token's user and delete all of that user's tokens.
+
+    Returns the user_id, or None if the token is unknown or expired. The token
+    row is locked first, so two concurrent resets with one token cannot both
+    succeed.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(FIND_TOKEN_QUERY, (hash_token(token),))
+        rows = cursor.fetchall()
+        if not rows:
+            conn.rollback()
+            return None
+        user_id = rows[0][1]
+        cursor.execute("UPDATE users SET password_hash = %s WHERE user_id = %s", (password_hash, user_id))
+        cursor.execute("DELETE FROM password_reset_tokens WHERE user_id = %s", (user_id,))
+        conn.commit()
+        return user_id
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def sweep_expired_tokens(conn, batch_size=500, pause=0.05, log=print):
+    """Delete expired tokens, batch_size rows per transaction; returns the count"""
+    cursor = conn.cursor()
+    try:
+        deleted = 0
+        while True:
+            cursor.execute(SWEEP_EXPIRED_QUERY, (batch_size,))
+            count = cursor.rowcount
+            conn.commit()
+            deleted += count
+            if count < batch_size:
+                break
+            log(f"[INFO] Deleted {deleted} expired reset tokens...")
+            time.sleep(pause)
+        return deleted
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Script to check inventory valuation running totals against a full recompute.
+Run periodically (e.g. nightly from cron); any drift is logged and repaired.
+"""
+import mysql.connector
+import os
+import sys
+from dotenv import load_dotenv
+
+from reports import reconcile_inventory_valuation
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    """Reconcile inventory_valuation and exit non-zero if drift was found"""
+    conn = None
+    try:
+        # Connect to database
+        conn = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME')
+        )
+
+        drift = reconcile_inventory_valuation(conn)
+
+        if not drift:
+            print("[OK] Inventory valuation matches current stock")
+            return 0
+
+        print(f"[WARNING] Repaired {len(drift)} drifted value(s):")
+        for row in drift:
+            print(f"  - {row['category']}.{row['field']}: stored {row['stored']}, actual {row['actual']}")
+        return 1
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+        return 2
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
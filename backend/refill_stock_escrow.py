@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Keep escrow slots of ultra-hot variants (ESCROW_VARIANTS) topped up from
+current_stock, and release escrow of variants no longer configured.
+Run every minute from cron, or with --interval to loop.
+"""
+import argparse
+import mysql.connector
+import os
+import time
+from dotenv import load_dotenv
+
+from sales import escrow_variants_from_env, refill_escrow, release_escrow
+
+# Load environment variables
+load_dotenv()
+
+def refill_all(conn, variants, slots, slot_size):
+    for variant_id in sorted(variants):
+        moved = refill_escrow(conn, variant_id, slots, slot_size)
+        if moved:
+            print(f"[OK] Variant {variant_id}: moved {moved} units into escrow")
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT DISTINCT variant_id FROM variant_stock_escrow")
+        stale = [row['variant_id'] for row in cursor.fetchall() if row['variant_id'] not in variants]
+        for variant_id in stale:
+            released = release_escrow(cursor, variant_id)
+            conn.commit()
+            print(f"[OK] Variant {variant_id}: released {released} escrowed units")
+    finally:
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--slots', type=int, default=int(os.getenv('ESCROW_SLOTS', 8)))
+    parser.add_argument('--slot-size', type=int, default=int(os.getenv('ESCROW_SLOT_SIZE', 20)))
+    parser.add_argument('--interval', type=float, help='seconds between refills; omit to run once')
+    args = parser.parse_args()
+
+    variants = escrow_variants_from_env()
+    conn = None
+    try:
+        # Connect to database
+        conn = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME')
+        )
+        while True:
+            refill_all(conn, variants, args.slots, args.slot_size)
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Reorder points from observed demand.
+
+Daily demand per variant comes from the product_sales_daily rollup, never the
+transaction tables, so the job takes no locks that sales wait on. Variants are
+processed in keyset batches; each batch becomes a variants x days matrix and
+the statistics for the whole batch are computed in one numpy pass:
+
+    reorder_point = demand_per_day * lead_time + safety_stock
+    safety_stock  = z(service_level) * demand_std * sqrt(lead_time)
+"""
+import math
+import time
+from datetime import timedelta
+from statistics import NormalDist
+
+from reports import VARIANT_STOCK, VARIANT_STOCK_JOIN
+
+VARIANT_BATCH_QUERY = """
+SELECT variant_id FROM product_variants
+WHERE variant_id > %s
+ORDER BY variant_id
+LIMIT %s
+"""
+
+DAILY_DEMAND_QUERY = """
+SELECT variant_id, sale_date, quantity
+FROM product_sales_daily
+WHERE variant_id BETWEEN %s AND %s
+AND sale_date >= %s AND sale_date < %s
+"""
+
+UPSERT_REORDER_POINT_QUERY = """
+INSERT INTO variant_reorder_points
+(variant_id, demand_per_day, demand_std, days_observed, lead_time_days, safety_stock, reorder_point)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    demand_per_day = VALUES(demand_per_day),
+    demand_std = VALUES(demand_std),
+    days_observed = VALUES(days_observed),
+    lead_time_days = VALUES(lead_time_days),
+    safety_stock = VALUES(safety_stock),
+    reorder_point = VALUES(reorder_point)
+"""
+
+# Thresholds the POS warns on that differ from the suggestion. A plain read:
+# a range UPDATE here would lock every variant in the batch until it commits
+CHANGED_THRESHOLDS_QUERY = """
+SELECT v.variant_id, r.reorder_point
+FROM product_variants v
+JOIN variant_reorder_points r ON r.variant_id = v.variant_id
+WHERE v.variant_id BETWEEN %s AND %s
+AND r.days_observed > 0
+AND v.low_stock_threshold <> r.reorder_point
+"""
+
+# Params: (reorder_point, variant_id)
+APPLY_THRESHOLD_QUERY = """
+UPDATE product_variants SET low_stock_threshold = %s WHERE variant_id = %s
+"""
+
+# Thresholds updated per transaction, so a sale never waits on more than a few row locks
+APPLY_CHUNK_SIZE = 100
+
+REORDER_POINTS_PAGE_QUERY = f"""
+SELECT r.variant_id, v.product_id, p.name AS product_name, v.color, v.model_compatibility,
+       {VARIANT_STOCK} AS current_stock, v.low_stock_threshold,
+       r.demand_per_day, r.demand_std, r.days_observed, r.lead_time_days,
+       r.safety_stock, r.reorder_point, r.computed_at
+FROM variant_reorder_points r
+JOIN product_variants v ON v.variant_id = r.variant_id
+JOIN products p ON p.product_id = v.product_id
+{VARIANT_STOCK_JOIN}
+WHERE r.variant_id > %s {{below}}
+ORDER BY r.variant_id
+LIMIT %s
+"""
+
+BELOW_REORDER_POINT_CLAUSE = f"AND {VARIANT_STOCK} <= r.reorder_point"
+
+
+def service_level_z(service_level):
+    """Safety factor for the chance of not running out during a lead time"""
+    if not 0 < service_level < 1:
+        raise ValueError("service_level must be between 0 and 1")
+    return NormalDist().inv_cdf(service_level)
+
+
+def compute_reorder_points(variant_ids, rows, start, days, lead_time, z):
+    """Demand statistics and reorder points for one batch of variants.
+
+    rows are (variant_id, sale_date, quantity) from the daily rollup for
+    [start, start + days); variants without rows had no demand. Returns one
+    upsert parameter tuple per variant, in variant_ids order.
+    """
+    # Imported on first use: numpy is the slowest import in the app
+    import numpy as np
+
+    ids = np.asarray(variant_ids, dtype=np.int64)
+    demand = np.zeros((len(ids), days), dtype=np.float64)
+    if rows:
+        row_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        day = np.fromiter(((r[1] - start).days for r in rows), dtype=np.int64, count=len(rows))
+        quantity = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+        # variant_ids is sorted (keyset order), so searchsorted maps ids to rows;
+        # rollup rows of variants that no longer exist are dropped
+        index = np.minimum(np.searchsorted(ids, row_ids), len(ids) - 1)
+        known = ids[index] == row_ids
+        np.add.at(demand, (index[known], day[known]), quantity[known])
+
+    rate = demand.mean(axis=1)
+    std = demand.std(axis=1, ddof=1) if days > 1 else np.zeros(len(ids))
+    observed = np.count_nonzero(demand, axis=1)
+    safety = np.ceil(z * std * math.sqrt(lead_time))
+    reorder = np.ceil(rate * lead_time + safety)
+
+    return list(zip(
+        ids.tolist(),
+        np.round(rate, 4).tolist(),
+        np.round(std, 4).tolist(),
+        observed.tolist(),
+        [lead_time] * len(ids),
+        safety.astype(np.int64).tolist(),
+        reorder.astype(np.int64).tolist()
+    ))
+
+
+def refresh_reorder_points(conn, end, window_days=90, lead_time=7, service_level=0.95,
+                           batch_size=5000, apply=False, pause=0.0, log=print):
+    """Recompute variant_reorder_points from demand in [end - window_days, end).
+
+    Each batch is read, computed and written in its own short transaction.
+    With apply=True, low_stock_threshold is also set to the new reorder point
+    for variants that sold at least once in the window; the changed variants
+    are read first, then updated by primary key APPLY_CHUNK_SIZE per commit.
+    """
+    z = service_level_z(service_level)
+    start = end - timedelta(days=window_days)
+    cursor = conn.cursor()
+    try:
+        after, done, changed = 0, 0, 0
+        while True:
+            cursor.execute(VARIANT_BATCH_QUERY, (after, batch_size))
+            variant_ids = [row[0] for row in cursor.fetchall()]
+            if not variant_ids:
+                break
+            first, last = variant_ids[0], variant_ids[-1]
+
+            cursor.execute(DAILY_DEMAND_QUERY, (first, last, start, end))
+            rows = cursor.fetchall()
+            conn.commit()
+
+            cursor.executemany(
+                UPSERT_REORDER_POINT_QUERY,
+                compute_reorder_points(variant_ids, rows, start, window_days, lead_time, z)
+            )
+            conn.commit()
+
+            if apply:
+                cursor.execute(CHANGED_THRESHOLDS_QUERY, (first, last))
+                updates = [(reorder_point, variant_id) for variant_id, reorder_point in cursor.fetchall()]
+                conn.commit()
+                for i in range(0, len(updates), APPLY_CHUNK_SIZE):
+                    cursor.executemany(APPLY_THRESHOLD_QUERY, updates[i:i + APPLY_CHUNK_SIZE])
+                    conn.commit()
+                changed += len(updates)
+
+            done += len(variant_ids)
+            after = last
+            log(f"[INFO] Reorder points computed for {done} variants...")
+            if pause:
+                time.sleep(pause)
+
+        return {'variants': done, 'thresholds_updated': changed, 'start': start, 'end': end}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
@@ -0,0 +1,245 @@
+"""
+Report helpers backed by precomputed rollup tables
+"""
+
+# Rollup rows are split into this many stripes (the `slot` column). Each sale
+# writes to one random stripe so a best seller does not funnel every checkout
+# through a single row; readers always SUM over the stripes.
+ROLLUP_STRIPES = 8
+
+# Stock held in escrow slots for ultra-hot variants (see sales.py) still
+# counts as on hand. Join this and read VARIANT_STOCK instead of current_stock.
+VARIANT_STOCK_JOIN = """
+LEFT JOIN (SELECT variant_id, SUM(quantity) AS escrowed
+           FROM variant_stock_escrow GROUP BY variant_id) e ON e.variant_id = v.variant_id
+"""
+VARIANT_STOCK = "(v.current_stock + COALESCE(e.escrowed, 0))"
+
+# Fold one transaction's line items into the daily per-variant buckets.
+# Runs on the sale's own cursor so the rollup commits (or rolls back) with it.
+# Params: (stripe, transaction_id)
+ROLLUP_SALE_QUERY = """
+INSERT INTO product_sales_daily (sale_date, variant_id, slot, quantity, revenue, cost)
+SELECT DATE(t.created_at), ti.variant_id, %s,
+       SUM(ti.quantity),
+       SUM(ti.quantity * ti.unit_price),
+       SUM(ti.quantity * p.cost_price)
+FROM transaction_items ti
+JOIN transactions t ON t.transaction_id = ti.transaction_id
+JOIN product_variants v ON v.variant_id = ti.variant_id
+JOIN products p ON p.product_id = v.product_id
+WHERE ti.transaction_id = %s
+GROUP BY DATE(t.created_at), ti.variant_id
+ON DUPLICATE KEY UPDATE
+    quantity = quantity + VALUES(quantity),
+    revenue = revenue + VALUES(revenue),
+    cost = cost + VALUES(cost)
+"""
+
+# Merge the daily buckets of a date range into one row per variant
+PRODUCT_PERFORMANCE_QUERY = """
+SELECT variant_id,
+       SUM(quantity) AS quantity,
+       SUM(revenue) AS revenue,
+       SUM(cost) AS cost
+FROM product_sales_daily
+"""
+
+PERFORMANCE_SORT_KEYS = ('revenue', 'quantity', 'margin')
+
+
+def rank_variants(rows, sort_by='revenue', limit=10):
+    """Rank merged variant buckets and compute margin for the top N"""
+    if not rows:
+        return []
+    # Imported on first use: numpy is the slowest import in the app
+    import numpy as np
+
+    variant_ids = np.fromiter((r['variant_id'] for r in rows), dtype=np.int64, count=len(rows))
+    quantity = np.fromiter((r['quantity'] or 0 for r in rows), dtype=np.int64, count=len(rows))
+    revenue = np.fromiter((r['revenue'] or 0 for r in rows), dtype=np.float64, count=len(rows))
+    cost = np.fromiter((r['cost'] or 0 for r in rows), dtype=np.float64, count=len(rows))
+    margin = revenue - cost
+
+    key = {'revenue': revenue, 'quantity': quantity, 'margin': margin}[sort_by]
+    limit = min(limit, len(rows))
+    # argpartition keeps the ranking O(n) before sorting only the top slice
+    top = np.argpartition(-key, limit - 1)[:limit]
+    top = top[np.argsort(-key[top], kind='stable')]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        margin_pct = np.where(revenue > 0, margin / revenue * 100, 0.0)
+        avg_price = np.where(quantity > 0, revenue / quantity, 0.0)
+
+    return [
+        {
+            'variant_id': int(variant_ids[i]),
+            'total_sold': int(quantity[i]),
+            'total_revenue': round(float(revenue[i]), 2),
+            'total_cost': round(float(cost[i]), 2),
+            'margin': round(float(margin[i]), 2),
+            'margin_pct': round(float(margin_pct[i]), 2),
+            'avg_price': round(float(avg_price[i]), 2),
+        }
+        for i in top
+    ]
+
+
+def sell_through(sold, current_stock):
+    """Share of available units sold over the period (opening stock ~ sold + on hand)"""
+    available = sold + max(current_stock or 0, 0)
+    if available <= 0:
+        return 0.0
+    return round(sold / available * 100, 2)
+
+
+# ========================
+# Inventory valuation
+# ========================
+# All valuation writes are signed deltas folded into inventory_valuation,
+# so the report never has to join every variant.
+_VALUATION_UPSERT = """
+INSERT INTO inventory_valuation (category, slot, units, cost_value, retail_value)
+{select}
+ON DUPLICATE KEY UPDATE
+    units = units + VALUES(units),
+    cost_value = cost_value + VALUES(cost_value),
+    retail_value = retail_value + VALUES(retail_value)
+"""
+
+# Stock leaving with a sale. Params: (stripe, transaction_id)
+VALUATION_SALE_QUERY = _VALUATION_UPSERT.format(select="""
+SELECT p.category, %s,
+       -SUM(ti.quantity),
+       -SUM(ti.quantity * p.cost_price),
+       -SUM(ti.quantity * p.base_price)
+FROM transaction_items ti
+JOIN product_variants v ON v.variant_id = ti.variant_id
+JOIN products p ON p.product_id = v.product_id
+WHERE ti.transaction_id = %s
+GROUP BY p.category
+""")
+
+# Params: (units_delta, units_delta, units_delta, variant_id)
+VALUATION_VARIANT_DELTA_QUERY = _VALUATION_UPSERT.format(select="""
+SELECT p.category, 0, %s, %s * p.cost_price, %s * p.base_price
+FROM product_variants v
+JOIN products p ON p.product_id = v.product_id
+WHERE v.variant_id = %s
+""")
+
+# Params: (sign, sign, sign, product_id). Run with -1 before a product's
+# price/category change and +1 after it to move its whole contribution.
+VALUATION_PRODUCT_QUERY = _VALUATION_UPSERT.format(select=f"""
+SELECT p.category, 0,
+       %s * SUM({VARIANT_STOCK}),
+       %s * SUM({VARIANT_STOCK} * p.cost_price),
+       %s * SUM({VARIANT_STOCK} * p.base_price)
+FROM products p
+JOIN product_variants v ON v.product_id = p.product_id
+{VARIANT_STOCK_JOIN}
+WHERE p.product_id = %s
+GROUP BY p.category
+""")
+
+INVENTORY_REPORT_QUERY = """
+SELECT category,
+       SUM(units) AS units,
+       SUM(cost_value) AS cost_value,
+       SUM(retail_value) AS retail_value,
+       SUM(retail_value - cost_value) AS potential_margin,
+       MAX(updated_at) AS updated_at
+FROM inventory_valuation
+GROUP BY category
+ORDER BY cost_value DESC
+"""
+
+VALUATION_RECOMPUTE_QUERY = f"""
+SELECT p.category,
+       SUM({VARIANT_STOCK}) AS units,
+       SUM({VARIANT_STOCK} * p.cost_price) AS cost_value,
+       SUM({VARIANT_STOCK} * p.base_price) AS retail_value
+FROM product_variants v
+JOIN products p ON p.product_id = v.product_id
+{VARIANT_STOCK_JOIN}
+GROUP BY p.category
+"""
+
+
+# Drift repair: the signed difference, added to slot 0. Params: (category, units, cost, retail)
+VALUATION_REPAIR_QUERY = _VALUATION_UPSERT.format(select="VALUES (%s, 0, %s, %s, %s)")
+
+
+def reconcile_inventory_valuation(conn):
+    """Compare running totals with a full recompute and repair any drift.
+
+    Both sides are read in one consistent snapshot without locking anything,
+    so checkouts never wait on the recompute. A sale changes stock and its
+    valuation delta in one transaction, so the snapshot sees both or neither.
+    Drift is repaired by adding (actual - stored) per category as one delta
+    row, which stays correct whatever sales commit in the meantime.
+    Returns a list of {category, field, stored, actual} for each mismatch.
+    """
+    fields = ('units', 'cost_value', 'retail_value')
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction(consistent_snapshot=True, isolation_level='REPEATABLE READ', readonly=True)
+        cursor.execute("SELECT category, units, cost_value, retail_value FROM inventory_valuation")
+        stored = {}
+        for row in cursor.fetchall():
+            totals = stored.setdefault(row['category'], dict.fromkeys(fields, 0))
+            for field in fields:
+                totals[field] += row[field]
+        cursor.execute(VALUATION_RECOMPUTE_QUERY)
+        actual = {row['category']: row for row in cursor.fetchall()}
+        conn.commit()
+
+        drift = []
+        repairs = []
+        empty = dict.fromkeys(fields, 0)
+        # Stripes are compared (and repaired) as one total per category
+        for category in stored.keys() | actual.keys():
+            old = stored.get(category, empty)
+            new = actual.get(category, empty)
+            delta = [(new[field] or 0) - (old[field] or 0) for field in fields]
+            if any(delta):
+                repairs.append((category, *delta))
+            for field in fields:
+                if (old[field] or 0) != (new[field] or 0):
+                    drift.append({
+                        'category': category, 'field': field,
+                        'stored': old[field], 'actual': new[field]
+                    })
+
+        if repairs:
+            cursor.executemany(VALUATION_REPAIR_QUERY, repairs)
+            conn.commit()
+        return drift
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+# ========================
+# Daily sales
+# ========================
+# One row per day; items are summed per transaction first so multi-item
+# baskets are not double counted. Params: (start, end) on created_at.
+DAILY_SALES_QUERY = """
+SELECT DATE(t.created_at) AS date,
+       COUNT(*) AS transactions,
+       SUM(t.total_amount) AS total_sales,
+       SUM((SELECT SUM(ti.quantity) FROM {items_table} ti
+            WHERE ti.transaction_id = t.transaction_id)) AS items_sold
+FROM {transactions_table} t
+WHERE t.created_at >= %s AND t.created_at < %s
+GROUP BY DATE(t.created_at)
+"""
+
+ARCHIVED_SALES_QUERY = """
+SELECT sale_date AS date, transactions, total_sales, items_sold
+FROM sales_daily
+WHERE sale_date >= %s AND sale_date < %s
+"""
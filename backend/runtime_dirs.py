@@ -0,0 +1,82 @@
+"""
+Directories for state shared between the app's worker processes on one host.
+
+They default to backend/run/<name> (APP_RUN_DIR overrides the parent), not
+the system temp directory, where any local user could create the path first.
+Existing directories are checked before use; callers fall back to
+per-process behaviour when a check fails.
+"""
+import logging
+import os
+import stat
+import threading
+
+logger = logging.getLogger('clessaapp.runtime_dirs')
+
+RUN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run')
+
+
+def default_path(name):
+    # APP_RUN_DIR is read per call: this module is imported before load_dotenv()
+    return os.path.join(os.getenv('APP_RUN_DIR') or RUN_DIR, name)
+
+
+def private_dir(path):
+    """Create or check a directory only this OS user can access.
+
+    Returns path, or None (with a warning) if it is not a real directory
+    owned by us with no group/other permissions.
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError as err:
+        logger.warning(f"Cannot use {path}: {err}")
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        logger.warning(f"Not using {path}: must be a directory owned by uid {os.getuid()} with mode 0700")
+        return None
+    return path
+
+
+def group_dir(path):
+    """Create or check a directory shared with the app's group (e.g. for manage.py).
+
+    New directories get mode 2770 so files inherit the group. Returns path,
+    or None (with a warning) if it is not a real directory owned by us or one
+    of our groups, or if it is writable by others.
+    """
+    try:
+        if not os.path.isdir(path):
+            os.makedirs(path, exist_ok=True)
+            os.chmod(path, 0o2770)
+        st = os.lstat(path)
+    except OSError as err:
+        logger.warning(f"Cannot use {path}: {err}")
+        return None
+    ours = st.st_uid == os.getuid() or st.st_gid in (os.getgid(), *os.getgroups())
+    if not stat.S_ISDIR(st.st_mode) or not ours or st.st_mode & 0o002:
+        logger.warning(f"Not using {path}: must be a directory owned by this user or group, not writable by others")
+        return None
+    return path
+
+
+def write_marker(path, stamp_ns):
+    """Atomically (re)create a marker file whose mtime is stamp_ns.
+
+    Writes a new file and renames it over the old one, so no process ever
+    has to modify (or own) a marker that another process, or another user
+    sharing a group_dir(), created.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w'):
+            pass
+        os.utime(tmp_path, ns=(stamp_ns, stamp_ns))
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,235 @@
+"""
+Sale recording: deterministic lock order, deadlock retries and stock escrow
+"""
+import os
+import random
+import secrets
+import time
+from datetime import datetime
+import mysql.connector
+
+from reports import ROLLUP_STRIPES, ROLLUP_SALE_QUERY, VALUATION_SALE_QUERY
+
+# ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK
+RETRYABLE_ERRORS = (1205, 1213)
+
+# Defaults for the SALE_* settings, which are read from the environment on
+# each use (callers may import this module before load_dotenv() runs)
+SALE_RETRY_ATTEMPTS = 4
+SALE_RETRY_BASE_DELAY = 0.02
+SALE_RETRY_MAX_DELAY = 0.5
+# Checkouts should fail fast and retry rather than wait the server default of 50s
+SALE_LOCK_WAIT_TIMEOUT = 5
+
+# Slots tried per escrowed line before falling back to product_variants
+ESCROW_ATTEMPTS = 2
+
+
+def escrow_variants_from_env():
+    """ESCROW_VARIANTS='12,57' -> frozenset({12, 57})"""
+    return frozenset(
+        int(v) for v in os.getenv('ESCROW_VARIANTS', '').split(',') if v.strip()
+    )
+
+
+def is_retryable(err):
+    return isinstance(err, mysql.connector.Error) and err.errno in RETRYABLE_ERRORS
+
+
+def with_retries(fn, attempts=None, base_delay=None, max_delay=None, on_retry=None):
+    """Call fn(), retrying deadlocks and lock wait timeouts with full-jitter backoff"""
+    attempts = attempts or int(os.getenv('SALE_RETRY_ATTEMPTS', SALE_RETRY_ATTEMPTS))
+    if base_delay is None:
+        base_delay = float(os.getenv('SALE_RETRY_BASE_DELAY', SALE_RETRY_BASE_DELAY))
+    if max_delay is None:
+        max_delay = float(os.getenv('SALE_RETRY_MAX_DELAY', SALE_RETRY_MAX_DELAY))
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except mysql.connector.Error as err:
+            if not is_retryable(err) or attempt == attempts - 1:
+                raise
+            if on_retry:
+                on_retry(err, attempt)
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+def configure_sale_session(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        "SET SESSION innodb_lock_wait_timeout = %s",
+        (int(os.getenv('SALE_LOCK_WAIT_TIMEOUT', SALE_LOCK_WAIT_TIMEOUT)),)
+    )
+    cursor.close()
+
+
+def take_from_escrow(cursor, variant_id, quantity):
+    """Decrement one escrow slot with enough stock; False if none could cover it"""
+    cursor.execute(
+        "SELECT slot FROM variant_stock_escrow WHERE variant_id = %s AND quantity >= %s",
+        (variant_id, quantity)
+    )
+    slots = [row['slot'] for row in cursor.fetchall()]
+    # Random slots spread concurrent terminals across rows
+    for slot in random.sample(slots, min(len(slots), ESCROW_ATTEMPTS)):
+        cursor.execute(
+            """UPDATE variant_stock_escrow SET quantity = quantity - %s
+            WHERE variant_id = %s AND slot = %s AND quantity >= %s""",
+            (quantity, variant_id, slot, quantity)
+        )
+        if cursor.rowcount:
+            return True
+    return False
+
+
+def record_sale(conn, user_id, data, escrow_variants=frozenset()):
+    """Write one sale in a single DB transaction and return its transaction_id.
+
+    Stock rows are locked first, in variant_id order, so two baskets sharing
+    variants always queue instead of deadlocking. The item inserts come after
+    that: their foreign key check only needs a shared lock on the variant,
+    which the sale already holds exclusively.
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        quantities = {}
+        for item in data['items']:
+            quantities[item['variant_id']] = quantities.get(item['variant_id'], 0) + item['quantity']
+
+        for variant_id in sorted(quantities):
+            quantity = quantities[variant_id]
+            if variant_id in escrow_variants and take_from_escrow(cursor, variant_id, quantity):
+                continue
+            cursor.execute(
+                """UPDATE product_variants
+                SET current_stock = current_stock - %s
+                WHERE variant_id = %s""",
+                (quantity, variant_id)
+            )
+
+        cursor.execute(
+            """INSERT INTO transactions
+            (receipt_number, user_id, total_amount, cash_received, change_given, customer_phone, customer_email)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+            (
+                # Suffix keeps receipts unique when terminals check out in the same second
+                f"REC-{datetime.now().strftime('%Y%m%d%H%M%S')}-{secrets.token_hex(2).upper()}",
+                user_id,
+                data['total_amount'],
+                data['cash_received'],
+                data['cash_received'] - data['total_amount'],
+                data.get('customer_phone'),
+                data.get('customer_email')
+            )
+        )
+        transaction_id = cursor.lastrowid
+
+        cursor.executemany(
+            """INSERT INTO transaction_items
+            (transaction_id, variant_id, quantity, unit_price)
+            VALUES (%s, %s, %s, %s)""",
+            [(transaction_id, item['variant_id'], item['quantity'], item['unit_price'])
+             for item in data['items']]
+        )
+
+        # Keep the daily product performance buckets and valuation totals current
+        stripe = random.randrange(ROLLUP_STRIPES)
+        cursor.execute(ROLLUP_SALE_QUERY, (stripe, transaction_id))
+        cursor.execute(VALUATION_SALE_QUERY, (stripe, transaction_id))
+
+        conn.commit()
+        return transaction_id
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+# ========================
+# Escrow maintenance
+# ========================
+# Lock order is always escrow slots, then the variant row, matching the sale
+# path's fallback (slot attempt, then product_variants).
+
+def refill_escrow(conn, variant_id, slots, slot_size):
+    """Top every slot up to slot_size from current_stock; returns units moved"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT slot, quantity FROM variant_stock_escrow WHERE variant_id = %s FOR UPDATE",
+            (variant_id,)
+        )
+        held = {row['slot']: row['quantity'] for row in cursor.fetchall()}
+        cursor.execute(
+            "SELECT current_stock FROM product_variants WHERE variant_id = %s FOR UPDATE",
+            (variant_id,)
+        )
+        variant = cursor.fetchone()
+        available = max(variant['current_stock'], 0) if variant else 0
+
+        moves = []
+        for slot in range(slots):
+            top_up = min(max(slot_size - held.get(slot, 0), 0), available)
+            if top_up:
+                moves.append((variant_id, slot, top_up))
+                available -= top_up
+
+        moved = sum(move[2] for move in moves)
+        if moves:
+            cursor.executemany(
+                """INSERT INTO variant_stock_escrow (variant_id, slot, quantity)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)""",
+                moves
+            )
+            cursor.execute(
+                "UPDATE product_variants SET current_stock = current_stock - %s WHERE variant_id = %s",
+                (moved, variant_id)
+            )
+        conn.commit()
+        return moved
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def lock_product_stock(cursor, product_id):
+    """Lock a product's stock rows, then the product row; False if there is no product.
+
+    Same order as a sale (per variant in variant_id order: escrow slots, then
+    the variant), and the product row last, since sales only read it after
+    holding their variants. Use before anything that rewrites the product's
+    valuation.
+    """
+    cursor.execute(
+        "SELECT variant_id FROM product_variants WHERE product_id = %s ORDER BY variant_id",
+        (product_id,)
+    )
+    variant_ids = [row['variant_id'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()]
+    for variant_id in variant_ids:
+        cursor.execute("SELECT slot FROM variant_stock_escrow WHERE variant_id = %s FOR UPDATE", (variant_id,))
+        cursor.fetchall()
+        cursor.execute("SELECT variant_id FROM product_variants WHERE variant_id = %s FOR UPDATE", (variant_id,))
+        cursor.fetchall()
+    cursor.execute("SELECT product_id FROM products WHERE product_id = %s FOR UPDATE", (product_id,))
+    return bool(cursor.fetchall())
+
+
+def release_escrow(cursor, variant_id):
+    """Fold a variant's escrowed stock back into current_stock (caller commits)"""
+    cursor.execute(
+        "SELECT COALESCE(SUM(quantity), 0) AS quantity FROM variant_stock_escrow WHERE variant_id = %s FOR UPDATE",
+        (variant_id,)
+    )
+    row = cursor.fetchone()
+    quantity = row['quantity'] if isinstance(row, dict) else row[0]
+    cursor.execute("DELETE FROM variant_stock_escrow WHERE variant_id = %s", (variant_id,))
+    if quantity:
+        cursor.execute(
+            "UPDATE product_variants SET current_stock = current_stock + %s WHERE variant_id = %s",
+            (quantity, variant_id)
+        )
+    return int(quantity)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Delete expired password reset tokens in small batches. Run from cron
+(e.g. every 15 minutes); each batch is its own short transaction.
+"""
+import argparse
+import mysql.connector
+import sys
+from dotenv import load_dotenv
+
+import db
+from password_reset import sweep_expired_tokens
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--pause', type=float, default=0.05,
+                        help='seconds to sleep between batches')
+    args = parser.parse_args()
+
+    conn = None
+    try:
+        # Connect to the primary (DB_HOST/DB_PORT)
+        conn = db.connect()
+
+        deleted = sweep_expired_tokens(conn, args.batch_size, args.pause)
+        print(f"[OK] {deleted} expired password reset tokens deleted")
+        return 0
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Database error: {err}")
+        return 2
+    finally:
+        if conn and conn.is_connected():
+            conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
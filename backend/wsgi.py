@@ -0,0 +1,6 @@
+"""
+WSGI entry point: gunicorn --preload -w 4 -b 0.0.0.0:5000 wsgi:app
+"""
+from clessaapp import create_app
+
+app = create_app()